@@ -0,0 +1,4 @@
+# Punto de entrada único: streamlit run app.py (la estrategia se elige con ESTRATEGIA en los secrets)
+from sazon.app import main
+
+main()
@@ -0,0 +1,88 @@
+"""Mide pedidos por segundo con muchos escritores concurrentes.
+
+Uso: python benchmarks/bench_almacen.py [--escritores 16] [--pedidos 200] [--lote 50] [--procesos]
+
+Compara el antiguo append a orders.csv (sin bloqueo ni estructura) con el
+OrderStore en SQLite, insertando de a uno y en lotes (group commit).
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sazon.almacen import OrderStore  # noqa: E402
+
+PEDIDO = {
+    "Platos": [
+        {"Plato": "Lomo saltado", "Cantidad": 2, "Precio Total": 30.0},
+        {"Plato": "Chicha", "Cantidad": 1, "Precio Total": 5.0},
+    ],
+    "Total": 35.0,
+    "Metodo de Pago": "Yape",
+    "Lugar de Entrega": "Miraflores",
+    "Timestamp Confirmacion": "2024-10-10 13:05:11",
+}
+
+
+def csv_append(ruta, pedidos, _lote):
+    """El save_order original: abrir, escribir una línea y cerrar por pedido."""
+    for _ in range(pedidos):
+        with open(ruta, "a") as f:
+            timestamp = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+            f.write(f"{timestamp}, {PEDIDO['Platos']}, {PEDIDO['Total']}\n")
+
+
+def sqlite_uno(ruta, pedidos, _lote):
+    store = OrderStore(ruta)
+    for _ in range(pedidos):
+        store.save(PEDIDO)
+
+
+def sqlite_lotes(ruta, pedidos, lote):
+    store = OrderStore(ruta)
+    for inicio in range(0, pedidos, lote):
+        store.save_many([PEDIDO] * min(lote, pedidos - inicio))
+
+
+def medir(escritor, ruta, escritores, pedidos, lote, procesos):
+    tipo = multiprocessing.Process if procesos else threading.Thread
+    trabajadores = [tipo(target=escritor, args=(ruta, pedidos, lote)) for _ in range(escritores)]
+    inicio = time.perf_counter()
+    for t in trabajadores:
+        t.start()
+    for t in trabajadores:
+        t.join()
+    return escritores * pedidos / (time.perf_counter() - inicio)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--escritores", type=int, default=16)
+    parser.add_argument("--pedidos", type=int, default=200, help="pedidos por escritor")
+    parser.add_argument("--lote", type=int, default=50, help="tamaño del lote para group commit")
+    parser.add_argument("--procesos", action="store_true", help="usar procesos en lugar de hilos")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directorio:
+        OrderStore(os.path.join(directorio, "uno.db"))
+        OrderStore(os.path.join(directorio, "lotes.db"))
+        for nombre, escritor, archivo in (
+            ("csv append (antes)", csv_append, "orders.csv"),
+            ("sqlite WAL, uno a uno", sqlite_uno, "uno.db"),
+            ("sqlite WAL, en lotes", sqlite_lotes, "lotes.db"),
+        ):
+            ruta = os.path.join(directorio, archivo)
+            por_segundo = medir(escritor, ruta, args.escritores, args.pedidos, args.lote, args.procesos)
+            print(f"{nombre:<24} {por_segundo:10.0f} pedidos/s")
+        total = OrderStore(os.path.join(directorio, "lotes.db")).count()
+        print(f"pedidos en lotes.db: {total} (esperados {args.escritores * args.pedidos})")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,121 @@
+"""Mide la analítica de pedidos: releer todo con pandas vs. agregados incrementales.
+
+Uso: python benchmarks/bench_analitica.py [--pedidos 200000] [--nuevos 1000]
+
+Llena un registro SQLite temporal con pedidos sintéticos y compara una consulta
+de "unidades por plato y hora" hecha como script ad hoc (leer toda la tabla,
+expandir el JSON de platos y agrupar) con OrderAnalytics: carga inicial,
+actualización con `--nuevos` pedidos, consultas y la caché columnar en disco.
+"""
+import argparse
+import json
+import os
+import random
+import sqlite3
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import pandas as pd
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from sazon.almacen import OrderStore  # noqa: E402
+from sazon.analitica import OrderAnalytics  # noqa: E402
+from sazon.catalogo import get_catalogo  # noqa: E402
+
+PAGOS = ["Yape", "Efectivo", "Tarjeta", "Plin"]
+
+
+def generar(carta, cantidad, inicio, semilla):
+    azar = random.Random(semilla)
+    platos = carta.menu[["Plato", "Precio"]].itertuples(index=False)
+    platos = [(p, float(precio)) for p, precio in platos]
+    extras = [(b, float(p)) for b, p in carta.bebidas[["descripcion", "precio"]].itertuples(index=False)]
+    extras += [(p, float(precio)) for p, precio in carta.postres[["Postres", "Precio"]].itertuples(index=False)]
+    distritos = carta.distritos["Distrito"].tolist() + ["Recojo en local"]
+    for n in range(cantidad):
+        items = [azar.choice(platos)] + azar.sample(extras, azar.randint(0, 2))
+        lineas = [{"Plato": p, "Cantidad": (c := azar.randint(1, 3)), "Precio Total": c * precio} for p, precio in items]
+        registrado = inicio + timedelta(seconds=n * 7)
+        yield registrado.strftime("%Y-%m-%d %H:%M:%S"), {
+            "Platos": lineas,
+            "Total": sum(linea["Precio Total"] for linea in lineas),
+            "Metodo de Pago": azar.choice(PAGOS),
+            "Lugar de Entrega": azar.choice(distritos),
+            "Timestamp Confirmacion": registrado.strftime("%Y-%m-%d %H:%M:%S"),
+        }
+
+
+def llenar(ruta, pedidos):
+    with sqlite3.connect(ruta) as conexion:
+        conexion.executemany(
+            "INSERT INTO pedidos (registrado, confirmado, distrito, metodo_pago, total, platos) VALUES (?, ?, ?, ?, ?, ?)",
+            [
+                (registrado, o["Timestamp Confirmacion"], o["Lugar de Entrega"], o["Metodo de Pago"], o["Total"],
+                 json.dumps(o["Platos"], ensure_ascii=False))
+                for registrado, o in pedidos
+            ],
+        )
+
+
+def ad_hoc(ruta):
+    """Lo que hacía un script suelto: leer todo, expandir platos y agrupar."""
+    with sqlite3.connect(ruta) as conexion:
+        df = pd.read_sql_query("SELECT registrado, platos FROM pedidos", conexion)
+    df["platos"] = df["platos"].map(json.loads)
+    items = df.explode("platos").dropna(subset=["platos"])
+    items = pd.concat([items["registrado"].reset_index(drop=True), pd.json_normalize(items["platos"].tolist())], axis=1)
+    items["hora"] = pd.to_datetime(items["registrado"]).dt.floor("h")
+    return items.groupby(["hora", "Plato"])["Cantidad"].sum().unstack(fill_value=0)
+
+
+def ms(fn, repeticiones=1):
+    inicio = time.perf_counter()
+    for _ in range(repeticiones):
+        resultado = fn()
+    return 1000 * (time.perf_counter() - inicio) / repeticiones, resultado
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--pedidos", type=int, default=200000)
+    parser.add_argument("--nuevos", type=int, default=1000)
+    args = parser.parse_args()
+
+    carta = get_catalogo(RAIZ).actual()
+    directorio = tempfile.mkdtemp()
+    ruta = os.path.join(directorio, "pedidos.db")
+    store = OrderStore(ruta)
+    inicio = datetime(2024, 10, 1, 11)
+    llenar(ruta, generar(carta, args.pedidos, inicio, 1))
+    print(f"{args.pedidos} pedidos en {ruta}")
+
+    t, _ = ms(lambda: ad_hoc(ruta))
+    print(f"ad hoc (releer todo)        {t:10.1f} ms por consulta")
+
+    analitica = OrderAnalytics(store, carta)
+    t, _ = ms(analitica.refresh)
+    print(f"carga inicial incremental   {t:10.1f} ms ({args.pedidos / t * 1000:,.0f} pedidos/s)")
+    llenar(ruta, generar(carta, args.nuevos, inicio + timedelta(seconds=args.pedidos * 7), 2))
+    t, nuevos = ms(analitica.refresh)
+    print(f"refresh con {nuevos} nuevos     {t:10.1f} ms")
+    for nombre, consulta in (
+        ("unidades por plato y hora", analitica.units_per_dish_hour),
+        ("ingresos por distrito/pago", analitica.revenue_by),
+        ("top bebidas y postres", analitica.top_addons),
+    ):
+        t, _ = ms(consulta, repeticiones=20)
+        print(f"{nombre:<27} {t:10.2f} ms")
+    cache = os.path.join(directorio, "analitica.npz")
+    t, _ = ms(lambda: analitica.save(cache))
+    print(f"guardar caché columnar      {t:10.1f} ms ({os.path.getsize(cache) / 1024:,.0f} KiB)")
+    t, cargada = ms(lambda: OrderAnalytics.load(cache, store, carta))
+    print(f"cargar caché columnar       {t:10.1f} ms")
+    assert cargada.units_per_dish_hour().equals(analitica.units_per_dish_hour())
+
+
+if __name__ == "__main__":
+    main()
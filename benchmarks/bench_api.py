@@ -0,0 +1,241 @@
+"""Prueba de carga de la API (sazon/api.py): conversaciones concurrentes contra un LLM falso.
+
+Uso: python benchmarks/bench_api.py [--sesiones 200] [--transporte ws|http] [--latencia 0.8]
+                                    [--primer-token 0.3] [--pausa 0] [--url URL]
+
+Levanta benchmarks/servidor_falso.py y `python -m sazon.api` en procesos aparte
+(salvo que se indique --url de una API ya levantada) y abre --sesiones clientes
+asyncio que recorren GUION por WebSocket o por HTTP con SSE. Reporta latencia
+por turno (p50/p95/p99), tiempo al primer fragmento, turnos por segundo,
+errores y la memoria residente del proceso de la API.
+
+La memoria por sesión no sale de la residente (que incluye los imports y
+cachés que se cargan con el primer turno): se mide aparte, en este proceso,
+con tracemalloc sobre un OrderService con StubBackend tras una sesión de
+calentamiento, como en bench_sesiones.py.
+"""
+import argparse
+import asyncio
+import gc
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+import urllib.request
+from urllib.parse import urlsplit
+
+import websockets
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_carga import GUION, percentil  # noqa: E402
+from sazon.api import OrderService  # noqa: E402
+from sazon.llm import StubBackend  # noqa: E402
+from sazon.turnos import Conversacion  # noqa: E402
+
+
+def puerto_libre():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def levantar(args):
+    """Servidor falso + API en procesos aparte; devuelve (url de la API, procesos)."""
+    puerto_llm, puerto_api = puerto_libre(), puerto_libre()
+    llm = subprocess.Popen(
+        [sys.executable, os.path.join(RAIZ, "benchmarks", "servidor_falso.py"), "--puerto", str(puerto_llm),
+         "--latencia", str(args.latencia), "--primer-token", str(args.primer_token)],
+        stdout=subprocess.DEVNULL,
+    )
+    entorno = dict(
+        os.environ,
+        LLM_BACKEND="openai",
+        OPENAI_API_KEY="falsa",
+        OPENAI_BASE_URL=f"http://127.0.0.1:{puerto_llm}/v1",
+        SAZON_PEDIDOS_DB=os.path.join(tempfile.mkdtemp(), "api.db"),
+        SAZON_API_HILOS=str(args.hilos),
+    )
+    api = subprocess.Popen(
+        [sys.executable, "-m", "sazon.api", "--host", "127.0.0.1", "--puerto", str(puerto_api)],
+        cwd=RAIZ, env=entorno,
+    )
+    url = f"http://127.0.0.1:{puerto_api}"
+    for _ in range(100):
+        try:
+            urllib.request.urlopen(f"{url}/salud", timeout=1).close()
+            return url, [llm, api]
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("La API no respondió en /salud")
+
+
+def memoria_mb(proceso):
+    """VmRSS del proceso en MiB (Linux); None si no se puede leer."""
+    try:
+        with open(f"/proc/{proceso.pid}/status") as f:
+            linea = next(linea for linea in f if linea.startswith("VmRSS:"))
+        return int(linea.split()[1]) / 1024
+    except (OSError, StopIteration):
+        return None
+
+
+def memoria_por_sesion(sesiones):
+    """Bytes retenidos por sesión en OrderService tras recorrer GUION (tracemalloc).
+
+    La primera sesión es de calentamiento: carga la carta, los índices, el
+    prompt por versión y los imports perezosos, que no son costo por sesión.
+    """
+    os.chdir(RAIZ)
+    servicio = OrderService(Conversacion(StubBackend()), hilos=4)
+
+    async def recorrer(sesion):
+        for texto in GUION:
+            async for _ in servicio.turn(sesion, texto):
+                pass
+
+    async def medir():
+        await recorrer(servicio.create())
+        gc.collect()
+        tracemalloc.start()
+        base = tracemalloc.get_traced_memory()[0]
+        for _ in range(sesiones):
+            await recorrer(servicio.create())
+        gc.collect()
+        usado = tracemalloc.get_traced_memory()[0] - base
+        tracemalloc.stop()
+        return usado / sesiones
+
+    return asyncio.run(medir())
+
+
+async def turno_ws(ws, texto):
+    await ws.send(json.dumps({"texto": texto}))
+    primer = None
+    inicio = time.perf_counter()
+    while True:
+        evento = json.loads(await ws.recv())
+        if evento["tipo"] == "fragmento" and primer is None:
+            primer = time.perf_counter() - inicio
+        if evento["tipo"] in ("fin", "rechazado"):
+            return evento, primer
+
+
+async def _post(url, cuerpo):
+    """POST con Connection: close; devuelve el lector ya pasado de las cabeceras."""
+    partes = urlsplit(url)
+    lector, escritor = await asyncio.open_connection(partes.hostname, partes.port)
+    datos = json.dumps(cuerpo).encode()
+    escritor.write(
+        f"POST {partes.path} HTTP/1.1\r\nHost: {partes.netloc}\r\nContent-Type: application/json\r\n"
+        f"Content-Length: {len(datos)}\r\nConnection: close\r\n\r\n".encode() + datos
+    )
+    estado = (await lector.readline()).split()[1]
+    if not estado.startswith(b"2"):
+        raise RuntimeError(f"POST {partes.path} -> {estado.decode()}")
+    while (await lector.readline()).strip():
+        pass
+    return lector, escritor
+
+
+async def crear_sesion(url):
+    lector, escritor = await _post(f"{url}/sesiones", {})
+    try:
+        return json.loads(await lector.read())["sesion"]
+    finally:
+        escritor.close()
+
+
+async def turno_http(url, texto):
+    """Turno por SSE; cada evento llega en su propio chunk, así basta leer por líneas."""
+    primer = None
+    inicio = time.perf_counter()
+    lector, escritor = await _post(url, {"texto": texto})
+    try:
+        while linea := await lector.readline():
+            if not linea.startswith(b"data: "):
+                continue
+            evento = json.loads(linea[6:])
+            if evento["tipo"] == "fragmento" and primer is None:
+                primer = time.perf_counter() - inicio
+            if evento["tipo"] in ("fin", "rechazado"):
+                return evento, primer
+    finally:
+        escritor.close()
+    raise RuntimeError("El stream terminó sin evento final")
+
+
+async def conversar(url, args, resultados, errores):
+    try:
+        sesion = await crear_sesion(url)
+        if args.transporte == "ws":
+            ws = await websockets.connect(f"ws{url[4:]}/sesiones/{sesion}/ws", max_size=None)
+        for texto in GUION:
+            inicio = time.perf_counter()
+            if args.transporte == "ws":
+                _, primer = await turno_ws(ws, texto)
+            else:
+                _, primer = await turno_http(f"{url}/sesiones/{sesion}/mensajes", texto)
+            resultados.append((time.perf_counter() - inicio, primer))
+            await asyncio.sleep(args.pausa)
+        if args.transporte == "ws":
+            await ws.close()
+    except Exception as e:
+        errores.append(repr(e))
+
+
+async def cargar(url, args):
+    resultados, errores = [], []
+    inicio = time.perf_counter()
+    await asyncio.gather(*(conversar(url, args, resultados, errores) for _ in range(args.sesiones)))
+    return resultados, errores, time.perf_counter() - inicio
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sesiones", type=int, default=200, help="conversaciones concurrentes")
+    parser.add_argument("--transporte", choices=("ws", "http"), default="ws")
+    parser.add_argument("--latencia", type=float, default=0.8, help="segundos hasta el último token")
+    parser.add_argument("--primer-token", type=float, default=0.3, help="segundos hasta el primer token")
+    parser.add_argument("--pausa", type=float, default=0.0, help="segundos que el cliente tarda en escribir")
+    parser.add_argument("--hilos", type=int, default=64, help="SAZON_API_HILOS de la API")
+    parser.add_argument("--url", help="API ya levantada (no se levantan procesos)")
+    args = parser.parse_args()
+
+    procesos = []
+    url = args.url
+    if url is None:
+        url, procesos = levantar(args)
+    try:
+        antes = memoria_mb(procesos[-1]) if procesos else None
+        resultados, errores, total = asyncio.run(cargar(url, args))
+        despues = memoria_mb(procesos[-1]) if procesos else None
+    finally:
+        for proceso in procesos:
+            proceso.terminate()
+
+    latencias = [r[0] * 1000 for r in resultados]
+    primeros = [r[1] * 1000 for r in resultados if r[1] is not None]
+    print(f"sesiones={args.sesiones} transporte={args.transporte} turnos={len(resultados)} "
+          f"errores={len(errores)} duracion={total:.2f}s")
+    if latencias:
+        print(f"latencia por turno ms   p50={percentil(latencias, 50):8.1f} p95={percentil(latencias, 95):8.1f} "
+              f"p99={percentil(latencias, 99):8.1f}")
+    if primeros:
+        print(f"primer fragmento ms     p50={percentil(primeros, 50):8.1f} p95={percentil(primeros, 95):8.1f} "
+              f"p99={percentil(primeros, 99):8.1f}")
+    print(f"throughput              {len(resultados) / total:.2f} turnos/s")
+    if antes is not None and despues is not None:
+        print(f"memoria de la API       {antes:.0f} -> {despues:.0f} MiB (residente)")
+    print(f"memoria por sesion      {memoria_por_sesion(args.sesiones) / 1024:.1f} KiB (tracemalloc)")
+    for error in sorted(set(errores))[:5]:
+        print(f"error: {error}")
+
+
+if __name__ == "__main__":
+    main()
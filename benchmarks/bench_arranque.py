@@ -0,0 +1,68 @@
+"""Mide el arranque en frío de la app: imports y milisegundos hasta el primer render.
+
+Uso: python benchmarks/bench_arranque.py [--estrategia conversacional|guiada] [--repeticiones 5] [--antes]
+
+Cada repetición corre en un proceso nuevo (sin módulos en caché), como un
+redeploy o un worker recién levantado: importa Streamlit y ejecuta la primera
+corrida de app.py con AppTest usando el backend de OpenAI con una clave
+ficticia (el cliente no llega a llamar a la red). --antes agrega, dentro del
+tiempo medido, lo que la app hacía al cargar: importar openai y pytz y
+construir el cliente.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HIJO = """
+import json, time
+inicio = time.perf_counter()
+import streamlit
+from streamlit.testing.v1 import AppTest
+streamlit_ms = (time.perf_counter() - inicio) * 1000
+inicio = time.perf_counter()
+if {antes!r}:
+    import pytz
+    from openai import OpenAI
+    OpenAI(api_key="sk-bench", max_retries=0)
+at = AppTest.from_file("app.py", default_timeout=60)
+at.secrets["ESTRATEGIA"] = {estrategia!r}
+at.secrets["LLM_BACKEND"] = "openai"
+at.secrets["OPENAI_API_KEY"] = "sk-bench"
+at.run()
+render_ms = (time.perf_counter() - inicio) * 1000
+assert not at.exception, at.exception
+print(json.dumps({{"streamlit_ms": streamlit_ms, "render_ms": render_ms}}))
+"""
+
+
+def medir(estrategia, antes):
+    entorno = dict(os.environ, SAZON_PEDIDOS_DB=os.path.join(tempfile.mkdtemp(), "pedidos.db"))
+    salida = subprocess.run(
+        [sys.executable, "-c", HIJO.format(estrategia=estrategia, antes=antes)],
+        cwd=RAIZ, env=entorno, capture_output=True, text=True, check=True,
+    )
+    return json.loads(salida.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--estrategia", default="conversacional")
+    parser.add_argument("--repeticiones", type=int, default=5)
+    parser.add_argument("--antes", action="store_true")
+    args = parser.parse_args()
+
+    medidas = [medir(args.estrategia, args.antes) for _ in range(args.repeticiones)]
+    print(f"app.py ({args.estrategia}){' (con imports y cliente al cargar)' if args.antes else ''}, {args.repeticiones} procesos nuevos")
+    for clave, nombre in (("streamlit_ms", "import streamlit"), ("render_ms", "hasta el primer render")):
+        valores = [m[clave] for m in medidas]
+        print(f"{nombre:<24} mediana {statistics.median(valores):8.1f} ms   min {min(valores):8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,181 @@
+"""Prueba de carga: N conversaciones de pedido concurrentes contra un LLM falso.
+
+Uso: python benchmarks/bench_carga.py [--sesiones 20] [--latencia 0.8] [--primer-token 0.3]
+                                      [--pausa 0] [--cliente http|stub] [--url URL]
+
+Cada sesión recorre GUION con turnos.Conversacion, el mismo turno que usan la
+app de Streamlit y la API (FAQ y límite de cantidades locales, ventana de
+contexto, armado del prompt, moderación en paralelo, respuesta por stream,
+pedido y extracción en segundo plano), sin interfaz. Con --cliente http las llamadas pasan por el SDK de
+OpenAI hasta benchmarks/servidor_falso.py (se levanta en otro proceso salvo que
+se indique --url); con --cliente stub se usa el StubBackend en el mismo proceso.
+
+Reporta latencia por turno (p50/p95/p99), tiempo al primer token, turnos por
+segundo, tokens enviados por turno y memoria por sesión.
+"""
+import argparse
+import gc
+import multiprocessing
+import os
+import pickle
+import statistics
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+# Los pedidos confirmados de la prueba no deben ir al orders.db real
+os.environ.setdefault("SAZON_PEDIDOS_DB", os.path.join(tempfile.mkdtemp(), "carga.db"))
+
+from servidor_falso import responder, start_server  # noqa: E402
+from sazon.catalogo import get_catalogo  # noqa: E402
+from sazon.cola import get_order_queue  # noqa: E402
+from sazon.llm import StubBackend, backend_from_config  # noqa: E402
+from sazon.metricas import Traza  # noqa: E402
+from sazon.stock import Stock  # noqa: E402
+from sazon.turnos import Conversacion, new_state  # noqa: E402
+
+# Mensajes del cliente en una conversación típica (ver RESPUESTAS en servidor_falso.py)
+GUION = [
+    "Hola",
+    "¿Qué hay de almuerzo?",
+    "Quiero 2 arroz con pollo",
+    "Delivery a Miraflores",
+    "Una Inka Kola",
+    "Pago con Yape",
+]
+
+
+class Sesion:
+    """Lo que la estrategia conversacional guarda en st.session_state para un cliente."""
+
+    def __init__(self, carta):
+        self.state = new_state(carta)
+
+
+class Turnos:
+    """Turnos de varias sesiones con una Conversacion compartida, como en un proceso de la app."""
+
+    def __init__(self, backend, carta):
+        self.conversacion = Conversacion(backend)
+        self.carta = carta
+        # Sin stock.csv: ningún plato se agota durante la prueba
+        self.stock = Stock({})
+
+    def generate_response(self, sesion, prompt):
+        """Devuelve (respuesta, tokens enviados, segundos al primer fragmento o None)."""
+        traza = Traza("carga")
+        inicio = time.perf_counter()
+        fragmentos = self.conversacion.respond(sesion.state, prompt, self.carta, self.stock, traza, moderate=True)
+        if fragmentos is None:
+            return None, traza.uso["prompt_tokens"], None
+        partes = []
+        primer_token = None
+        for fragmento in fragmentos:
+            if primer_token is None:
+                primer_token = time.perf_counter() - inicio
+            partes.append(fragmento)
+        # Las respuestas locales no pasan por el modelo: sin tokens ni primer token
+        if not traza.uso["prompt_tokens"]:
+            primer_token = None
+        return "".join(partes), traza.uso["prompt_tokens"], primer_token
+
+
+def conversar(turnos, sesion, pausa, resultados):
+    for prompt in GUION:
+        inicio = time.perf_counter()
+        _, tokens, primer_token = turnos.generate_response(sesion, prompt)
+        resultados.append((time.perf_counter() - inicio, tokens, primer_token))
+        time.sleep(pausa)
+
+
+def percentil(valores, p):
+    valores = sorted(valores)
+    return valores[min(len(valores) - 1, int(round(p / 100 * (len(valores) - 1))))]
+
+
+def memoria_por_sesion(sesiones):
+    """Bytes retenidos por sesión: se reconstruye el estado bajo tracemalloc y se mide.
+
+    Se usa pickle y no deepcopy porque deepcopy comparte los str y no los contaría.
+    """
+    datos = pickle.dumps([s.state for s in sesiones])
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    copia = pickle.loads(datos)
+    usado = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    del copia
+    return usado / len(sesiones)
+
+
+def _servir(latencia, primer_token, cola):
+    _, url = start_server(0, latencia, primer_token)
+    cola.put(url)
+    while True:
+        time.sleep(3600)
+
+
+def crear_backend(args):
+    if args.cliente == "stub":
+        return StubBackend(latencia=args.latencia, primer_token=args.primer_token, responder=responder,
+                           prohibidas=("idiota",))
+    url = args.url
+    if url is None:
+        cola = multiprocessing.Queue()
+        proceso = multiprocessing.Process(target=_servir, args=(args.latencia, args.primer_token, cola), daemon=True)
+        proceso.start()
+        url = cola.get(timeout=10)
+    return backend_from_config({"LLM_BACKEND": "openai", "OPENAI_API_KEY": "falsa", "OPENAI_BASE_URL": url})
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sesiones", type=int, default=20, help="conversaciones concurrentes")
+    parser.add_argument("--latencia", type=float, default=0.8, help="segundos hasta el último token")
+    parser.add_argument("--primer-token", type=float, default=0.3, help="segundos hasta el primer token")
+    parser.add_argument("--pausa", type=float, default=0.0, help="segundos que el cliente tarda en escribir")
+    parser.add_argument("--cliente", choices=("http", "stub"), default="http")
+    parser.add_argument("--url", help="servidor compatible con OpenAI ya levantado")
+    args = parser.parse_args()
+
+    carta = get_catalogo(RAIZ).actual()
+    turnos = Turnos(crear_backend(args), carta)
+    sesiones = [Sesion(carta) for _ in range(args.sesiones)]
+    resultados = []
+    hilos = [
+        threading.Thread(target=conversar, args=(turnos, sesion, args.pausa, resultados))
+        for sesion in sesiones
+    ]
+    inicio = time.perf_counter()
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+    total = time.perf_counter() - inicio
+    cola = get_order_queue()
+    cola.close()
+
+    latencias = [r[0] * 1000 for r in resultados]
+    llm = [r for r in resultados if r[1]]
+    ttft = [r[2] * 1000 for r in llm if r[2] is not None]
+    print(f"sesiones={args.sesiones} turnos={len(resultados)} (al modelo: {len(llm)}) "
+          f"pedidos_confirmados={cola.stats['encolados']} duracion={total:.2f}s")
+    print(f"latencia por turno ms   p50={percentil(latencias, 50):8.1f} p95={percentil(latencias, 95):8.1f} "
+          f"p99={percentil(latencias, 99):8.1f}")
+    if ttft:
+        print(f"primer token ms         p50={percentil(ttft, 50):8.1f} p95={percentil(ttft, 95):8.1f} "
+              f"p99={percentil(ttft, 99):8.1f}")
+    print(f"throughput              {len(resultados) / total:.2f} turnos/s")
+    if llm:
+        print(f"tokens enviados/turno   media={statistics.mean(r[1] for r in llm):.0f} "
+              f"max={max(r[1] for r in llm)} (solo turnos al modelo)")
+    print(f"memoria por sesion      {memoria_por_sesion(sesiones) / 1024:.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,81 @@
+"""Compara la extracción del pedido por turno: llamada al modelo vs. parser local.
+
+Uso: python benchmarks/bench_extraccion.py [--latencia 0.35] [--conversaciones 20]
+
+La llamada al modelo se simula con una espera de `--latencia` segundos, así que
+no hace falta clave de API.
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from sazon.extraccion import has_confirmation_marker, parse_confirmed_order  # noqa: E402
+
+# Respuestas típicas del asistente en una conversación de pedido
+CONVERSACION = [
+    "¡Hola! Bienvenido a Sazón Bot. ¿Qué te puedo ofrecer hoy?",
+    "Perfecto, 2 Lomo saltado. ¿Desea recoger su pedido en el local o prefiere entrega a domicilio?",
+    "Repartimos en Miraflores. Su pedido:\n\n| **Plato** | **Cantidad** | **Precio Total** |\n|---|---|---|\n"
+    "| Lomo saltado | 2 | S/30.00 |\n| **Total** | | **S/ 30.00** |\n\n¿Desea añadir una bebida o postre?",
+    "Aquí está lista de bebidas: Chicha morada - 5.0 soles. ¿Desea agregar algo más?",
+    "¿Estás de acuerdo con el pedido?",
+    "¿Cuál es su método de pago preferido? Aceptamos tarjeta, efectivo o Yape.",
+    "El pedido confirmado será:\n\n| **Plato** | **Cantidad** | **Precio Total** |\n"
+    "|-----------|--------------|------------------|\n| Lomo saltado | 2 | S/30.00 |\n"
+    "| Chicha | 1 | S/5.00 |\n| **Total** |              | **S/ 35.00**      |\n\n"
+    "- *Método de pago*: Yape\n- *Lugar de entrega*: Miraflores\n"
+    "- *Timestamp Confirmacion*: 2024-10-10 13:05:11",
+]
+
+
+class FakeLLM:
+    """Simula la llamada de extracción al modelo contando llamadas."""
+
+    def __init__(self, latencia):
+        self.latencia = latencia
+        self.llamadas = 0
+
+    def extract(self, response):
+        self.llamadas += 1
+        time.sleep(self.latencia)
+        return {}
+
+
+def antes(llm, response):
+    return llm.extract(response)
+
+
+def despues(llm, response):
+    if not has_confirmation_marker(response):
+        return {}
+    return parse_confirmed_order(response) or llm.extract(response)
+
+
+def medir(estrategia, conversaciones, latencia):
+    llm = FakeLLM(latencia)
+    turnos = 0
+    inicio = time.perf_counter()
+    for _ in range(conversaciones):
+        for response in CONVERSACION:
+            estrategia(llm, response)
+            turnos += 1
+    total = time.perf_counter() - inicio
+    return {"turnos": turnos, "ms_por_turno": 1000 * total / turnos, "llamadas_api": llm.llamadas}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--latencia", type=float, default=0.35, help="segundos por llamada simulada")
+    parser.add_argument("--conversaciones", type=int, default=20)
+    args = parser.parse_args()
+
+    for nombre, estrategia in (("antes (LLM por turno)", antes), ("despues (parser local)", despues)):
+        r = medir(estrategia, args.conversaciones, args.latencia)
+        print(f"{nombre:<24} turnos={r['turnos']:<5} ms/turno={r['ms_por_turno']:9.3f} llamadas_api={r['llamadas_api']}")
+
+
+if __name__ == "__main__":
+    main()
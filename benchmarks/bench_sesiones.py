@@ -0,0 +1,74 @@
+"""Mide la memoria del historial por sesión: lista de dicts vs. prefijo compartido + Mensaje.
+
+Uso: python benchmarks/bench_sesiones.py [--sesiones 500] [--turnos 8]
+
+"antes" arma para cada sesión el prompt del sistema y la bienvenida como dicts
+(compile_system_prompt, sin el caché por versión) y agrega los turnos como
+dicts; "despues" usa mensajes.new_history(carta). Los textos de cada turno
+son distintos por sesión, como pasaría con clientes reales.
+"""
+import argparse
+import gc
+import os
+import sys
+import tracemalloc
+
+RAIZ = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RAIZ)
+
+from sazon.catalogo import get_catalogo  # noqa: E402
+from sazon.mensajes import BIENVENIDA, new_history  # noqa: E402
+from sazon.prompts import compile_system_prompt, get_system_prompt  # noqa: E402
+from sazon.render import format_menu_table  # noqa: E402
+
+
+def antes(carta):
+    # Prompt y bienvenida nuevos por sesión: get_system_prompt los compartiría
+    return [
+        {"role": "system", "content": compile_system_prompt(carta)},
+        {"role": "assistant", "content": BIENVENIDA.format(menu=format_menu_table(carta.menu))},
+    ]
+
+
+def despues(carta):
+    return new_history(carta)
+
+
+def medir(crear, carta, sesiones, turnos):
+    """Bytes retenidos por sesión (tracemalloc), sin contar los textos de los turnos."""
+    textos = [
+        [(f"Quiero {n} arroz con pollo, sesión {s}", f"Perfecto, anoto {n} Arroz con Pollo (sesión {s}).")
+         for n in range(turnos)]
+        for s in range(sesiones)
+    ]
+    crear(carta)  # el prefijo compartido se crea una vez por versión, fuera de la medición
+    gc.collect()
+    tracemalloc.start()
+    base = tracemalloc.get_traced_memory()[0]
+    historiales = []
+    for propios in textos:
+        historial = crear(carta)
+        for usuario, asistente in propios:
+            historial.append({"role": "user", "content": usuario})
+            historial.append({"role": "assistant", "content": asistente})
+        historiales.append(historial)
+    usado = tracemalloc.get_traced_memory()[0] - base
+    tracemalloc.stop()
+    return usado / sesiones
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sesiones", type=int, default=500)
+    parser.add_argument("--turnos", type=int, default=8)
+    args = parser.parse_args()
+
+    carta = get_catalogo(RAIZ).actual()
+    prefijo = len(get_system_prompt(carta)) + len(format_menu_table(carta.menu))
+    print(f"prefijo compartido: {prefijo} caracteres; {args.sesiones} sesiones x {args.turnos} turnos")
+    for nombre, crear in (("antes (dicts)", antes), ("despues (Mensaje)", despues)):
+        print(f"{nombre:<20} {medir(crear, carta, args.sesiones, args.turnos):10.0f} bytes/sesion")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+"""Servidor falso compatible con la API de OpenAI para pruebas de carga sin red.
+
+Uso: python benchmarks/servidor_falso.py [--puerto 8765] [--latencia 0.8] [--primer-token 0.3]
+
+Atiende /v1/chat/completions (con y sin stream) y /v1/moderations. Las
+respuestas del chat salen de RESPUESTAS según el último mensaje del cliente;
+las pedidas de extracción devuelven un JSON vacío y la moderación marca los
+mensajes que contienen alguna palabra de PROHIBIDAS.
+"""
+import argparse
+import json
+import threading
+import time
+import unicodedata
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+TABLA = (
+    "| **Plato** | **Cantidad** | **Precio Total** |\n"
+    "|-----------|--------------|------------------|\n"
+    "| Arroz con Pollo | 2 | S/24.00 |\n"
+    "{extra}"
+    "| **Total** |              | **S/ {total}**      |\n"
+)
+
+# Respuesta del asistente según el mensaje del cliente (normalizado)
+RESPUESTAS = {
+    "hola": "¡Hola! ¿Qué te gustaría pedir hoy? Tenemos el menú del día listo para ti.",
+    "quiero 2 arroz con pollo": "Perfecto, anoto 2 Arroz con Pollo.\n\n" + TABLA.format(extra="", total="24.00")
+    + "\n¿Desea recoger su pedido en el local o prefiere entrega a domicilio?",
+    "delivery a miraflores": "Repartimos en Miraflores. ¿Desea añadir una bebida o postre?",
+    "una inka kola": "Agregado.\n\n" + TABLA.format(extra="| Inka Kola (355ml) | 1 | S/3.50 |\n", total="27.50")
+    + "\n¿Cuál es su método de pago preferido? Aceptamos tarjeta, efectivo o Yape.",
+    "pago con yape": "El pedido confirmado será:\n\n" + TABLA.format(extra="| Inka Kola (355ml) | 1 | S/3.50 |\n", total="27.50")
+    + "\n- *Método de pago*: Yape\n- *Lugar de entrega*: Miraflores\n"
+    "- *Timestamp Confirmacion*: 2024-10-10 13:05:11\n\n¡Gracias por tu pedido!",
+}
+RESPUESTA_GENERICA = "Claro, con gusto te ayudo con tu pedido. ¿Qué más deseas agregar?"
+PROHIBIDAS = ("idiota", "estupido")
+
+
+def _normalizar(texto):
+    texto = unicodedata.normalize("NFKD", texto.lower())
+    return " ".join("".join(c for c in texto if not unicodedata.combining(c)).split())
+
+
+def responder(messages):
+    """Texto de la respuesta para una lista de mensajes de chat."""
+    if messages[0]["content"].startswith("Eres un asistente que extrae"):
+        return "{}"
+    usuario = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+    return RESPUESTAS.get(_normalizar(usuario), RESPUESTA_GENERICA)
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    latencia = 0.8
+    primer_token = 0.3
+
+    def log_message(self, *args):
+        pass
+
+    def _json(self, cuerpo):
+        datos = json.dumps(cuerpo).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(datos)))
+        self.end_headers()
+        self.wfile.write(datos)
+
+    def do_POST(self):
+        peticion = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+        if self.path.endswith("/moderations"):
+            time.sleep(self.latencia / 4)
+            flagged = any(p in _normalizar(peticion["input"]) for p in PROHIBIDAS)
+            self._json({"id": "modr-falso", "model": "falso", "results": [
+                {"flagged": flagged, "categories": {}, "category_scores": {}}
+            ]})
+            return
+        texto = responder(peticion["messages"])
+        uso = {
+            "prompt_tokens": sum(len(m["content"]) for m in peticion["messages"]) // 4,
+            "completion_tokens": len(texto) // 4,
+        }
+        uso["total_tokens"] = uso["prompt_tokens"] + uso["completion_tokens"]
+        base = {"id": "chatcmpl-falso", "created": int(time.time()), "model": peticion["model"]}
+        if not peticion.get("stream"):
+            time.sleep(self.latencia)
+            self._json({**base, "object": "chat.completion", "usage": uso, "choices": [
+                {"index": 0, "finish_reason": "stop", "message": {"role": "assistant", "content": texto}}
+            ]})
+            return
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Transfer-Encoding", "chunked")
+        self.end_headers()
+        palabras = texto.split(" ")
+        pausa = max(self.latencia - self.primer_token, 0) / len(palabras)
+        time.sleep(self.primer_token)
+        for n, palabra in enumerate(palabras):
+            if n:
+                time.sleep(pausa)
+            chunk = {**base, "object": "chat.completion.chunk", "choices": [
+                {"index": 0, "finish_reason": None, "delta": {"content": palabra if n == 0 else " " + palabra}}
+            ]}
+            self._enviar(f"data: {json.dumps(chunk)}\n\n")
+        if peticion.get("stream_options", {}).get("include_usage"):
+            self._enviar(f"data: {json.dumps({**base, 'object': 'chat.completion.chunk', 'choices': [], 'usage': uso})}\n\n")
+        # [DONE] y el fin del chunked van juntos: el SDK deja de leer en [DONE] y, si el
+        # cierre llega después, descarta la conexión en vez de devolverla al pool
+        self._enviar("data: [DONE]\n\n", fin=b"0\r\n\r\n")
+
+    def _enviar(self, evento, fin=b""):
+        datos = evento.encode()
+        self.wfile.write(f"{len(datos):x}\r\n".encode() + datos + b"\r\n" + fin)
+        self.wfile.flush()
+
+
+def start_server(puerto=0, latencia=0.8, primer_token=0.3):
+    """Levanta el servidor en un hilo; devuelve (servidor, url base para el cliente)."""
+    handler = type("Handler", (_Handler,), {"latencia": latencia, "primer_token": primer_token})
+    servidor = ThreadingHTTPServer(("127.0.0.1", puerto), handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="servidor-falso", daemon=True).start()
+    return servidor, f"http://127.0.0.1:{servidor.server_address[1]}/v1"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--puerto", type=int, default=8765)
+    parser.add_argument("--latencia", type=float, default=0.8, help="segundos hasta el último token")
+    parser.add_argument("--primer-token", type=float, default=0.3, help="segundos hasta el primer token")
+    args = parser.parse_args()
+    servidor, url = start_server(args.puerto, args.latencia, args.primer_token)
+    print(f"Servidor falso en {url} (OPENAI_BASE_URL)")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        servidor.shutdown()
+
+
+if __name__ == "__main__":
+    main()
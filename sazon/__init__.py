@@ -0,0 +1 @@
+"""Núcleo de Sazón Bot: carta, pedidos, backends de LLM, persistencia y las estrategias de conversación."""
@@ -0,0 +1,203 @@
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+
+from .extraccion import parse_amount
+
+RUTA_PEDIDOS = os.environ.get("SAZON_PEDIDOS_DB", "orders.db")
+
+_ESQUEMA = """
+CREATE TABLE IF NOT EXISTS pedidos (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    registrado TEXT NOT NULL,
+    confirmado TEXT,
+    distrito TEXT,
+    metodo_pago TEXT,
+    total REAL,
+    platos TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS pedidos_registrado ON pedidos (registrado);
+CREATE INDEX IF NOT EXISTS pedidos_distrito ON pedidos (distrito, registrado);
+CREATE TABLE IF NOT EXISTS stock (
+    sucursal TEXT NOT NULL,
+    plato TEXT NOT NULL,
+    restante INTEGER NOT NULL,
+    PRIMARY KEY (sucursal, plato)
+);
+CREATE TABLE IF NOT EXISTS stock_fuente (
+    sucursal TEXT PRIMARY KEY,
+    hash TEXT NOT NULL
+);
+"""
+
+
+def _plato(item):
+    if not isinstance(item, dict):
+        return item
+    cantidad = parse_amount(item.get("Cantidad"))
+    return {
+        **item,
+        "Cantidad": int(cantidad) if cantidad is not None else None,
+        "Precio Total": parse_amount(item.get("Precio Total")),
+    }
+
+
+def _fila(order_json, registrado=None):
+    """Convierte el JSON de un pedido (formato de extract_order_json) en una fila.
+
+    Cantidades e importes se guardan como números aunque el modelo los haya
+    escrito como texto ("S/ 26.00"); los que no se pueden leer quedan en NULL.
+    """
+    return (
+        registrado or datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        order_json.get("Timestamp Confirmacion"),
+        order_json.get("Lugar de Entrega"),
+        order_json.get("Metodo de Pago"),
+        parse_amount(order_json.get("Total")),
+        json.dumps([_plato(p) for p in order_json.get("Platos") or []], ensure_ascii=False, separators=(",", ":")),
+    )
+
+
+def _pedido(fila):
+    id_, registrado, confirmado, distrito, metodo_pago, total, platos = fila
+    return {
+        "id": id_,
+        "Registrado": registrado,
+        "Platos": json.loads(platos),
+        "Total": total,
+        "Metodo de Pago": metodo_pago,
+        "Lugar de Entrega": distrito,
+        "Timestamp Confirmacion": confirmado,
+    }
+
+
+class OrderStore:
+    """Registro de pedidos en SQLite (modo WAL), seguro con varios hilos y procesos.
+
+    Cada hilo usa su propia conexión; SQLite serializa a los escritores de
+    distintos procesos y `save_many` confirma un lote entero en una sola
+    transacción (group commit).
+    """
+
+    def __init__(self, ruta=RUTA_PEDIDOS, timeout=30.0):
+        self.ruta = ruta
+        self.timeout = timeout
+        self._local = threading.local()
+        with self._conexion() as conexion:
+            conexion.executescript(_ESQUEMA)
+
+    def _conexion(self):
+        conexion = getattr(self._local, "conexion", None)
+        if conexion is None:
+            conexion = sqlite3.connect(self.ruta, timeout=self.timeout)
+            conexion.execute("PRAGMA journal_mode=WAL")
+            # Con WAL, NORMAL no corrompe la base ante un corte; como mucho se
+            # pierden las últimas transacciones confirmadas
+            conexion.execute("PRAGMA synchronous=NORMAL")
+            self._local.conexion = conexion
+        return conexion
+
+    def save(self, order_json):
+        """Guarda un pedido y devuelve su id."""
+        with self._conexion() as conexion:
+            cursor = conexion.execute(
+                "INSERT INTO pedidos (registrado, confirmado, distrito, metodo_pago, total, platos)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                _fila(order_json),
+            )
+        return cursor.lastrowid
+
+    def save_many(self, orders):
+        """Guarda varios pedidos en una sola transacción."""
+        filas = [_fila(o) for o in orders]
+        with self._conexion() as conexion:
+            conexion.executemany(
+                "INSERT INTO pedidos (registrado, confirmado, distrito, metodo_pago, total, platos)"
+                " VALUES (?, ?, ?, ?, ?, ?)",
+                filas,
+            )
+        return len(filas)
+
+    def between(self, desde, hasta):
+        """Pedidos registrados entre dos timestamps 'YYYY-MM-DD HH:MM:SS' (inclusive)."""
+        filas = self._conexion().execute(
+            "SELECT * FROM pedidos WHERE registrado BETWEEN ? AND ? ORDER BY registrado",
+            (desde, hasta),
+        )
+        return [_pedido(f) for f in filas]
+
+    def by_district(self, distrito, desde=None):
+        """Pedidos de un distrito, opcionalmente desde un timestamp."""
+        filas = self._conexion().execute(
+            "SELECT * FROM pedidos WHERE distrito = ? AND registrado >= ? ORDER BY registrado",
+            (distrito, desde or ""),
+        )
+        return [_pedido(f) for f in filas]
+
+    def iter_since(self, ultimo_id=0, tamano=10000):
+        """Filas crudas con id > ultimo_id en bloques de `tamano`, en orden de id."""
+        cursor = self._conexion().execute(
+            "SELECT id, registrado, confirmado, distrito, metodo_pago, total, platos"
+            " FROM pedidos WHERE id > ? ORDER BY id",
+            (ultimo_id,),
+        )
+        while True:
+            bloque = cursor.fetchmany(tamano)
+            if not bloque:
+                return
+            yield bloque
+
+    def count(self):
+        return self._conexion().execute("SELECT COUNT(*) FROM pedidos").fetchone()[0]
+
+    def init_stock(self, sucursal, inicial, digest):
+        """Unidades restantes de la sucursal {plato: restante}.
+
+        Si `digest` (hash de stock.csv) cambió desde la última carga, las
+        unidades se reponen con `inicial`; si no, se conservan las ventas ya
+        registradas, también las de otros procesos o de antes de reiniciar.
+        """
+        with self._conexion() as conexion:
+            # Dos procesos que arrancan juntos no deben reponer dos veces
+            conexion.execute("BEGIN IMMEDIATE")
+            fila = conexion.execute("SELECT hash FROM stock_fuente WHERE sucursal = ?", (sucursal,)).fetchone()
+            if fila is None or fila[0] != digest:
+                conexion.execute("DELETE FROM stock WHERE sucursal = ?", (sucursal,))
+                conexion.executemany(
+                    "INSERT INTO stock (sucursal, plato, restante) VALUES (?, ?, ?)",
+                    [(sucursal, plato, int(cantidad)) for plato, cantidad in inicial.items()],
+                )
+                conexion.execute(
+                    "INSERT OR REPLACE INTO stock_fuente (sucursal, hash) VALUES (?, ?)", (sucursal, digest)
+                )
+        return self.stock_counts(sucursal)
+
+    def stock_counts(self, sucursal):
+        """{plato: restante} de la sucursal."""
+        return dict(self._conexion().execute(
+            "SELECT plato, restante FROM stock WHERE sucursal = ?", (sucursal,)
+        ))
+
+    def sell_stock(self, sucursal, cantidades):
+        """Descuenta {plato: cantidad} en una transacción y devuelve los restantes de la sucursal."""
+        with self._conexion() as conexion:
+            conexion.executemany(
+                "UPDATE stock SET restante = MAX(restante - ?, 0) WHERE sucursal = ? AND plato = ?",
+                [(int(cantidad), sucursal, plato) for plato, cantidad in cantidades.items()],
+            )
+        return self.stock_counts(sucursal)
+
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+
+def get_store(ruta=RUTA_PEDIDOS):
+    """Devuelve el OrderStore compartido del proceso para la ruta dada."""
+    clave = os.path.abspath(ruta)
+    with _stores_lock:
+        if clave not in _stores:
+            _stores[clave] = OrderStore(ruta)
+        return _stores[clave]
@@ -0,0 +1,309 @@
+import atexit
+import json
+import logging
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .almacen import get_store
+from .catalogo import get_registry
+from .indice import get_index
+
+TAMANO_BLOQUE = 10000
+RUTA_CACHE = os.environ.get("SAZON_ANALITICA_CACHE", "analitica.npz")
+# Pedidos nuevos leídos que fuerzan a guardar la caché; el resto se guarda al salir
+GUARDAR_CADA = int(os.environ.get("SAZON_ANALITICA_GUARDAR_CADA", "5000"))
+SIN_DATO = "Sin dato"
+CATEGORIAS_EXTRA = ("bebida", "postre")
+_POR = {"distrito": "distrito", "metodo_pago": "pago"}
+
+
+class _Vocabulario:
+    """Códigos enteros para los textos de una columna (distritos, pagos, platos)."""
+
+    def __init__(self, valores=()):
+        self.valores = list(valores)
+        self._codigos = {v: i for i, v in enumerate(self.valores)}
+
+    def _codigo(self, valor):
+        codigo = self._codigos.get(valor)
+        if codigo is None:
+            codigo = self._codigos[valor] = len(self.valores)
+            self.valores.append(valor)
+        return codigo
+
+    def encode(self, valores):
+        # factorize agrupa los repetidos; solo los valores únicos pasan por el dict
+        inversos, unicos = pd.factorize(np.asarray(valores, dtype=object))
+        mapa = np.fromiter((self._codigo(v) for v in unicos), dtype=np.int32, count=len(unicos))
+        return mapa[inversos]
+
+    def decode(self, codigos):
+        return np.asarray(self.valores, dtype=object)[np.asarray(codigos, dtype=np.int64)]
+
+
+class _Columnas:
+    """Columnas NumPy que crecen por bloques; se unen recién al leerlas."""
+
+    def __init__(self, tipos):
+        self.tipos = tipos
+        self._partes = {nombre: [] for nombre in tipos}
+
+    def append(self, **columnas):
+        for nombre, valores in columnas.items():
+            self._partes[nombre].append(np.asarray(valores, dtype=self.tipos[nombre]))
+
+    def __getitem__(self, nombre):
+        partes = self._partes[nombre]
+        if len(partes) != 1:
+            unida = np.concatenate(partes) if partes else np.empty(0, dtype=self.tipos[nombre])
+            self._partes[nombre] = [unida]
+        return self._partes[nombre][0]
+
+    def __len__(self):
+        return sum(len(p) for p in self._partes[next(iter(self.tipos))])
+
+
+def _texto(valores):
+    serie = pd.Series(valores, dtype=object).fillna("").astype(str).str.strip()
+    # "yape" y "Yape" cuentan juntos; el resto del texto se deja como vino
+    serie = serie.str[:1].str.upper() + serie.str[1:]
+    return serie.mask(serie == "", SIN_DATO).to_numpy(dtype=object)
+
+
+def _numeros(valores):
+    """Valores numéricos del registro a float; textos ("S/ 26.00", "dos") quedan en 0.
+
+    Devuelve (valores, cuántos no eran números); None y NaN cuentan como 0 sin error.
+    """
+    serie = pd.Series(valores, dtype=object)
+    numeros = pd.to_numeric(serie, errors="coerce")
+    invalidos = int((numeros.isna() & serie.notna()).sum())
+    return numeros.fillna(0.0).to_numpy(dtype=float), invalidos
+
+
+def _horas(timestamps):
+    """Timestamps 'YYYY-MM-DD HH:MM:SS' a horas desde 1970 (int64)."""
+    return pd.to_datetime(pd.Series(timestamps)).to_numpy().astype("datetime64[h]").astype(np.int64)
+
+
+def _hora(timestamp):
+    return np.datetime64(pd.Timestamp(timestamp), "h").astype(np.int64)
+
+
+class OrderAnalytics:
+    """Agregados de ventas sobre el registro de pedidos, actualizados de forma incremental.
+
+    `refresh()` lee solo los pedidos nuevos (id mayor al último visto) en
+    bloques, los guarda en columnas NumPy y suma los agregados del bloque
+    (groupby vectorizado) a los acumulados por hora. Las consultas solo filtran y
+    reagrupan esos acumulados, así que no dependen del tamaño del registro.
+    """
+
+    def __init__(self, store=None, carta=None, tamano_bloque=TAMANO_BLOQUE):
+        self.store = store or get_store()
+        self.carta = carta
+        self.tamano_bloque = tamano_bloque
+        self.ultimo_id = 0
+        self.vocab = {"distrito": _Vocabulario(), "pago": _Vocabulario(), "plato": _Vocabulario()}
+        self.categorias = []    # categoría por código de plato
+        self._nombres = {}      # nombre en el pedido -> código de plato
+        self.pedidos = _Columnas({"id": np.int64, "hora": np.int64, "distrito": np.int32, "pago": np.int32, "total": np.float64})
+        self.items = _Columnas({"hora": np.int64, "plato": np.int32, "cantidad": np.int64, "importe": np.float64})
+        self._por_plato = None  # (hora, plato) -> cantidad, importe
+        self._por_zona = None   # (hora, distrito, pago) -> total, pedidos
+        self._lock = threading.RLock()
+        self.stats = {"pedidos": 0, "items": 0, "bloques": 0, "invalidos": 0, "segundos": 0.0}
+
+    def _codigo_plato(self, nombre):
+        """Código del ítem con su nombre de la carta (o el del pedido si no está en la carta)."""
+        codigo = self._nombres.get(nombre)
+        if codigo is None:
+            carta = self.carta or get_registry().actual()
+            entrada = get_index(carta).match(str(nombre))
+            canonico, categoria = (entrada.nombre, entrada.categoria) if entrada else (str(nombre).strip(), "otro")
+            codigo = self.vocab["plato"].encode([canonico])[0]
+            if codigo == len(self.categorias):
+                self.categorias.append(categoria)
+            self._nombres[nombre] = codigo
+        return codigo
+
+    @staticmethod
+    def _sumar(acumulado, bloque, claves):
+        parcial = bloque.groupby(list(claves)).sum()
+        return parcial if acumulado is None else acumulado.add(parcial, fill_value=0)
+
+    def _agregar(self, hora, distrito, pago, total, item_hora, plato, cantidad, importe):
+        self._por_zona = self._sumar(self._por_zona, pd.DataFrame({
+            "hora": hora, "distrito": distrito, "pago": pago, "total": total, "pedidos": 1,
+        }), ("hora", "distrito", "pago"))
+        self._por_plato = self._sumar(self._por_plato, pd.DataFrame({
+            "hora": item_hora, "plato": plato, "cantidad": cantidad, "importe": importe,
+        }), ("hora", "plato"))
+
+    def _ingest(self, bloque):
+        ids, registrados, _, distritos, pagos, totales, platos = zip(*bloque)
+        hora = _horas(registrados)
+        distrito = self.vocab["distrito"].encode(_texto(distritos))
+        pago = self.vocab["pago"].encode(_texto(pagos))
+        total, invalidos = _numeros(totales)
+        filas = [
+            (i, item.get("Plato"), item.get("Cantidad"), item.get("Precio Total"))
+            for i, texto in enumerate(platos)
+            for item in json.loads(texto)
+            if item.get("Plato")
+        ]
+        posicion, nombres, cantidad, importe = (list(c) for c in zip(*filas)) if filas else ([], [], [], [])
+        cantidad, cantidades_invalidas = _numeros(cantidad)
+        cantidad = cantidad.astype(np.int64)
+        importe, importes_invalidos = _numeros(importe)
+        posicion = np.asarray(posicion, dtype=np.int64)
+        inversos, unicos = pd.factorize(np.asarray(nombres, dtype=object))
+        plato = np.asarray([self._codigo_plato(n) for n in unicos], dtype=np.int32)[inversos]
+        item_hora = hora[posicion]
+        self.pedidos.append(id=ids, hora=hora, distrito=distrito, pago=pago, total=total)
+        self.items.append(hora=item_hora, plato=plato, cantidad=cantidad, importe=importe)
+        self._agregar(hora, distrito, pago, total, item_hora, plato, cantidad, importe)
+        self.stats["pedidos"] += len(bloque)
+        self.stats["items"] += len(filas)
+        self.stats["bloques"] += 1
+        self.stats["invalidos"] += invalidos + cantidades_invalidas + importes_invalidos
+
+    def refresh(self):
+        """Incorpora los pedidos registrados desde la última llamada; devuelve cuántos."""
+        with self._lock:
+            inicio = time.perf_counter()
+            nuevos = 0
+            for bloque in self.store.iter_since(self.ultimo_id, self.tamano_bloque):
+                self._ingest(bloque)
+                self.ultimo_id = bloque[-1][0]
+                nuevos += len(bloque)
+            self.stats["segundos"] += time.perf_counter() - inicio
+            return nuevos
+
+    @staticmethod
+    def _rango(df, desde, hasta):
+        if df is None:
+            return None
+        horas = df.index.get_level_values("hora")
+        mascara = np.ones(len(df), dtype=bool)
+        if desde is not None:
+            mascara &= horas >= _hora(desde)
+        if hasta is not None:
+            mascara &= horas <= _hora(hasta)
+        return df[mascara]
+
+    def _platos(self, codigos):
+        return self.vocab["plato"].decode(codigos)
+
+    def units_per_dish_hour(self, desde=None, hasta=None):
+        """Unidades vendidas por hora (filas) y plato (columnas)."""
+        with self._lock:
+            df = self._rango(self._por_plato, desde, hasta)
+            if df is None or df.empty:
+                return pd.DataFrame()
+            tabla = df["cantidad"].unstack("plato", fill_value=0).astype(np.int64)
+        tabla.index = pd.DatetimeIndex(tabla.index.to_numpy().astype("datetime64[h]"), name="hora")
+        tabla.columns = pd.Index(self._platos(tabla.columns), name="plato")
+        return tabla
+
+    def revenue_by(self, por=("distrito", "metodo_pago"), desde=None, hasta=None):
+        """Ingresos, pedidos y ticket promedio por distrito y/o método de pago."""
+        niveles = [_POR[p] for p in por]
+        with self._lock:
+            df = self._rango(self._por_zona, desde, hasta)
+            if df is None or df.empty:
+                return pd.DataFrame(columns=[*por, "ingresos", "pedidos", "ticket_promedio"])
+            tabla = df.groupby(level=niveles).sum().reset_index()
+            for columna, nivel in zip(por, niveles):
+                tabla[columna] = self.vocab[nivel].decode(tabla.pop(nivel))
+        tabla = tabla.rename(columns={"total": "ingresos"})
+        tabla["pedidos"] = tabla["pedidos"].astype(np.int64)
+        tabla["ticket_promedio"] = tabla["ingresos"] / tabla["pedidos"]
+        return tabla[[*por, "ingresos", "pedidos", "ticket_promedio"]].sort_values("ingresos", ascending=False, ignore_index=True)
+
+    def top_addons(self, n=5, categorias=CATEGORIAS_EXTRA, desde=None, hasta=None):
+        """Bebidas y postres más pedidos, con unidades e ingresos."""
+        with self._lock:
+            df = self._rango(self._por_plato, desde, hasta)
+            if df is None or df.empty:
+                return pd.DataFrame(columns=["plato", "categoria", "unidades", "ingresos"])
+            tabla = df.groupby(level="plato").sum()
+            categoria = np.asarray(self.categorias, dtype=object)[tabla.index.to_numpy()]
+            mascara = np.isin(categoria, categorias)
+            tabla = tabla[mascara].nlargest(n, "cantidad")
+            return pd.DataFrame({
+                "plato": self._platos(tabla.index),
+                "categoria": np.asarray(self.categorias, dtype=object)[tabla.index.to_numpy()],
+                "unidades": tabla["cantidad"].to_numpy(dtype=np.int64),
+                "ingresos": tabla["importe"].to_numpy(),
+            })
+
+    def save(self, ruta=RUTA_CACHE):
+        """Guarda las columnas y el último id leído para no releer el registro al reiniciar."""
+        with self._lock:
+            columnas = {f"pedidos_{n}": self.pedidos[n] for n in self.pedidos.tipos}
+            columnas.update({f"items_{n}": self.items[n] for n in self.items.tipos})
+            columnas.update({f"vocab_{n}": np.asarray(v.valores, dtype=str) for n, v in self.vocab.items()})
+            temporal = f"{ruta}.tmp"
+            with open(temporal, "wb") as f:
+                np.savez_compressed(
+                    f, ultimo_id=self.ultimo_id, categorias=np.asarray(self.categorias, dtype=str), **columnas
+                )
+            os.replace(temporal, ruta)
+
+    @classmethod
+    def load(cls, ruta=RUTA_CACHE, store=None, carta=None):
+        """Reconstruye los agregados desde la caché columnar con un solo groupby."""
+        analitica = cls(store, carta)
+        with np.load(ruta) as datos:
+            analitica.ultimo_id = int(datos["ultimo_id"])
+            analitica.categorias = datos["categorias"].tolist()
+            for nombre in analitica.vocab:
+                analitica.vocab[nombre] = _Vocabulario(datos[f"vocab_{nombre}"].tolist())
+            analitica.pedidos.append(**{n: datos[f"pedidos_{n}"] for n in analitica.pedidos.tipos})
+            analitica.items.append(**{n: datos[f"items_{n}"] for n in analitica.items.tipos})
+        p, i = analitica.pedidos, analitica.items
+        if len(p):
+            analitica._agregar(p["hora"], p["distrito"], p["pago"], p["total"],
+                               i["hora"], i["plato"], i["cantidad"], i["importe"])
+        return analitica
+
+
+_analitica = None
+_analitica_lock = threading.Lock()
+_sin_guardar = 0
+
+
+def _guardar(ruta):
+    """Guarda la caché si hay pedidos leídos que aún no están en ella."""
+    global _sin_guardar
+    with _analitica_lock:
+        if _analitica is None or not _sin_guardar:
+            return
+        try:
+            _analitica.save(ruta)
+            _sin_guardar = 0
+        except OSError as e:
+            logging.error(f"No se pudo guardar la caché de analítica en {ruta}: {e}")
+
+
+def get_analytics(ruta=RUTA_CACHE):
+    """Analítica compartida del proceso; parte de la caché si existe y se pone al día.
+
+    La caché se guarda cada GUARDAR_CADA pedidos nuevos y al salir del proceso,
+    así un reinicio solo relee lo que llegó después.
+    """
+    global _analitica, _sin_guardar
+    with _analitica_lock:
+        if _analitica is None:
+            _analitica = OrderAnalytics.load(ruta) if os.path.exists(ruta) else OrderAnalytics()
+            atexit.register(_guardar, ruta)
+        _sin_guardar += _analitica.refresh()
+        guardar = _sin_guardar >= GUARDAR_CADA
+    if guardar:
+        _guardar(ruta)
+    return _analitica
@@ -0,0 +1,261 @@
+"""API HTTP/WebSocket de pedidos, sin Streamlit.
+
+Uso: python -m sazon.api [--host 0.0.0.0] [--puerto 8000]
+
+Expone el mismo turno que la app conversacional (turnos.Conversacion) con
+sesiones guardadas en el servidor. La configuración sale de las variables de
+entorno (LLM_BACKEND, OPENAI_API_KEY, CONTEXTO_TOKENS, METRICAS_JSONL, ...).
+
+    POST   /sesiones                  {"sucursal": "..."} -> sesión nueva y bienvenida
+    GET    /sesiones/{id}             historial y pedido
+    DELETE /sesiones/{id}
+    POST   /sesiones/{id}/mensajes    {"texto": "..."} -> eventos SSE (?stream=0: un solo JSON)
+    WS     /sesiones/{id}/ws          {"texto": "..."} -> eventos JSON
+    GET    /salud, /metrics
+
+Eventos de un turno: {"tipo": "fragmento", "texto"}, {"tipo": "rechazado", "texto"}
+y al final {"tipo": "fin", "respuesta", "pedido"}.
+"""
+import argparse
+import asyncio
+import json
+import os
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from starlette.applications import Starlette
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route, WebSocketRoute
+from starlette.websockets import WebSocketDisconnect
+
+from .cache import TTLCache
+from .catalogo import SUCURSAL_PRINCIPAL, get_registry
+from .llm import backend_from_config
+from .metricas import Traza, configure as configure_metricas, registro
+from .stock import get_stock
+from .turnos import MENSAJE_RESPETO, Conversacion, new_state
+
+# Sesiones en memoria: las inactivas por más de SAZON_API_TTL segundos se descartan
+MAX_SESIONES = int(os.environ.get("SAZON_API_SESIONES", "10000"))
+SESION_TTL = float(os.environ.get("SAZON_API_TTL", "1800"))
+# Turnos en curso a la vez: cada uno ocupa un hilo para sus pasos bloqueantes y,
+# mientras espera, dos más (moderación y primer fragmento) en un pool aparte
+HILOS = int(os.environ.get("SAZON_API_HILOS", "64"))
+_FIN = object()
+
+
+class Sesion:
+    """Conversación guardada en el servidor; el lock serializa sus turnos."""
+
+    __slots__ = ("id", "sucursal", "estado", "lock")
+
+    def __init__(self, sucursal, carta):
+        self.id = uuid.uuid4().hex[:12]
+        self.sucursal = sucursal
+        self.estado = new_state(carta)
+        self.lock = asyncio.Lock()
+
+
+class OrderService:
+    """Sesiones y turnos de la API sobre asyncio.
+
+    El SDK del LLM es bloqueante: cada paso del turno (armar el prompt, esperar
+    la moderación y cada fragmento) corre en el pool de hilos y el event loop
+    solo reparte los fragmentos, así un proceso atiende muchas conversaciones.
+    La moderación y el primer fragmento van a un segundo pool, dimensionado
+    con el mismo `hilos`: si compartieran el pool, los turnos que esperan
+    ocuparían los hilos que necesitan para terminar.
+    """
+
+    def __init__(self, conversacion, max_sesiones=MAX_SESIONES, ttl=SESION_TTL, hilos=HILOS):
+        self.conversacion = conversacion
+        self.sesiones = TTLCache(max_size=max_sesiones, ttl=ttl)
+        self._hilos = ThreadPoolExecutor(max_workers=hilos, thread_name_prefix="sazon-api")
+        if conversacion.executor is None:
+            conversacion.executor = ThreadPoolExecutor(max_workers=2 * hilos, thread_name_prefix="sazon-api-llm")
+
+    def create(self, sucursal=SUCURSAL_PRINCIPAL):
+        """Sesión nueva; KeyError si la sucursal no existe."""
+        carta = get_registry().actual(sucursal)
+        sesion = Sesion(sucursal, carta)
+        self.sesiones.put(sesion.id, sesion)
+        return sesion
+
+    def get(self, sesion_id):
+        sesion = self.sesiones.get(sesion_id)
+        if sesion is not None:
+            # Renueva el vencimiento: cuenta desde el último uso
+            self.sesiones.put(sesion_id, sesion)
+        return sesion
+
+    async def _correr(self, fn, *args):
+        return await asyncio.get_running_loop().run_in_executor(self._hilos, fn, *args)
+
+    async def turn(self, sesion, texto):
+        """Corre un turno y entrega sus eventos a medida que llegan los fragmentos."""
+        async with sesion.lock:
+            carta = get_registry().actual(sesion.sucursal)
+            stock = get_stock(sesion.sucursal, carta)
+            traza = Traza(sesion.id)
+            try:
+                fragmentos = await self._correr(
+                    self.conversacion.respond, sesion.estado, texto, carta, stock, traza, True
+                )
+                if fragmentos is None:
+                    yield {"tipo": "rechazado", "texto": MENSAJE_RESPETO}
+                    return
+                partes = []
+                try:
+                    while (fragmento := await self._correr(next, fragmentos, _FIN)) is not _FIN:
+                        partes.append(fragmento)
+                        yield {"tipo": "fragmento", "texto": fragmento}
+                finally:
+                    # Cliente desconectado a mitad de la respuesta: se cierra el stream
+                    if hasattr(fragmentos, "close"):
+                        await self._correr(fragmentos.close)
+                yield {"tipo": "fin", "respuesta": "".join(partes), "pedido": sesion.estado["pedido"].to_json()}
+            finally:
+                traza.finish()
+
+
+def _sesion_json(sesion):
+    return {
+        "sesion": sesion.id,
+        "sucursal": sesion.sucursal,
+        "mensajes": [
+            {"role": m["role"], "content": m["content"]}
+            for m in sesion.estado["messages"] if m["role"] != "system"
+        ],
+        "pedido": sesion.estado["pedido"].to_json(),
+    }
+
+
+def _no_encontrada():
+    return JSONResponse({"error": "Sesión desconocida o vencida"}, status_code=404)
+
+
+async def _cuerpo(request):
+    """Cuerpo JSON como dict ({} si viene vacío), o None si no es un objeto JSON."""
+    if not await request.body():
+        return {}
+    try:
+        cuerpo = await request.json()
+    except ValueError:
+        return None
+    return cuerpo if isinstance(cuerpo, dict) else None
+
+
+def _texto_de(cuerpo):
+    texto = cuerpo.get("texto") if isinstance(cuerpo, dict) else None
+    return texto.strip() if isinstance(texto, str) and texto.strip() else None
+
+
+async def _texto(request):
+    return _texto_de(await _cuerpo(request))
+
+
+def create_app(config=os.environ):
+    """Aplicación ASGI con el backend y las métricas según `config`."""
+    backend = backend_from_config(config)
+    configure_metricas(jsonl=config.get("METRICAS_JSONL"))
+    servicio = OrderService(Conversacion(
+        backend,
+        contexto_tokens=int(config.get("CONTEXTO_TOKENS", 4000)),
+        contexto_turnos=int(config.get("CONTEXTO_TURNOS", 6)),
+    ))
+
+    async def crear(request):
+        cuerpo = await _cuerpo(request)
+        if cuerpo is None:
+            return JSONResponse({"error": "El cuerpo debe ser un objeto JSON"}, status_code=400)
+        sucursal = cuerpo.get("sucursal", SUCURSAL_PRINCIPAL)
+        if not isinstance(sucursal, str):
+            return JSONResponse({"error": '"sucursal" debe ser texto'}, status_code=400)
+        try:
+            sesion = servicio.create(sucursal)
+        except KeyError as e:
+            return JSONResponse({"error": e.args[0]}, status_code=400)
+        datos = _sesion_json(sesion)
+        datos["bienvenida"] = sesion.estado["messages"][1]["content"]
+        return JSONResponse(datos, status_code=201)
+
+    async def ver(request):
+        sesion = servicio.get(request.path_params["sesion"])
+        return _no_encontrada() if sesion is None else JSONResponse(_sesion_json(sesion))
+
+    async def borrar(request):
+        servicio.sesiones.pop(request.path_params["sesion"])
+        return Response(status_code=204)
+
+    async def mensaje(request):
+        sesion = servicio.get(request.path_params["sesion"])
+        if sesion is None:
+            return _no_encontrada()
+        texto = await _texto(request)
+        if texto is None:
+            return JSONResponse({"error": 'Falta "texto"'}, status_code=400)
+        eventos = servicio.turn(sesion, texto)
+        if request.query_params.get("stream") == "0":
+            ultimo = None
+            async for ultimo in eventos:
+                pass
+            return JSONResponse(ultimo)
+
+        async def sse():
+            async for evento in eventos:
+                yield f"data: {json.dumps(evento, ensure_ascii=False)}\n\n"
+        return StreamingResponse(sse(), media_type="text/event-stream")
+
+    async def websocket(ws):
+        sesion = servicio.get(ws.path_params["sesion"])
+        await ws.accept()
+        if sesion is None:
+            await ws.close(code=4404)
+            return
+        try:
+            while True:
+                try:
+                    cuerpo = json.loads(await ws.receive_text())
+                except ValueError:
+                    cuerpo = None
+                texto = _texto_de(cuerpo)
+                if texto is None:
+                    await ws.send_json({"tipo": "error", "texto": 'Se espera un objeto JSON con "texto"'})
+                    continue
+                async for evento in servicio.turn(sesion, texto):
+                    await ws.send_json(evento)
+                servicio.get(sesion.id)
+        except WebSocketDisconnect:
+            pass
+
+    async def salud(request):
+        return JSONResponse({"ok": True, "sesiones": len(servicio.sesiones)})
+
+    async def metrics(request):
+        return PlainTextResponse(registro.to_prometheus(), media_type="text/plain; version=0.0.4")
+
+    app = Starlette(routes=[
+        Route("/sesiones", crear, methods=["POST"]),
+        Route("/sesiones/{sesion}", ver, methods=["GET"]),
+        Route("/sesiones/{sesion}", borrar, methods=["DELETE"]),
+        Route("/sesiones/{sesion}/mensajes", mensaje, methods=["POST"]),
+        WebSocketRoute("/sesiones/{sesion}/ws", websocket),
+        Route("/salud", salud),
+        Route("/metrics", metrics),
+    ])
+    app.state.servicio = servicio
+    return app
+
+
+def main():
+    import uvicorn
+
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--host", default="0.0.0.0")
+    parser.add_argument("--puerto", type=int, default=8000)
+    args = parser.parse_args()
+    uvicorn.run(create_app(), host=args.host, port=args.puerto, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
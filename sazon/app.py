@@ -0,0 +1,48 @@
+import importlib
+import logging
+
+import streamlit as st
+
+from .catalogo import SUCURSAL_PRINCIPAL
+
+# Estrategias de conversación (ESTRATEGIA en st.secrets); solo se importa la elegida
+ESTRATEGIAS = {
+    "conversacional": "sazon.conversacional",  # chat libre con el modelo (antes main3.py)
+    "guiada": "sazon.guiada",                  # pedido, confirmación y distrito paso a paso (antes main.py/main2.py)
+}
+ESTRATEGIA_POR_DEFECTO = "conversacional"
+
+# Mensaje de bienvenida
+INTRO = """¡Bienvenido a Sazón Bot, el lugar donde todos tus antojos de almuerzo se hacen realidad!
+Comienza a chatear con Sazón Bot y descubre qué puedes pedir, cuánto cuesta y cómo realizar tu pago. ¡Estamos aquí para ayudarte a disfrutar del mejor almuerzo!"""
+
+
+def load_strategy(nombre):
+    """Módulo de la estrategia; Python lo importa (y arma su backend) una sola vez por proceso."""
+    if nombre not in ESTRATEGIAS:
+        raise ValueError(f"Estrategia desconocida: {nombre!r} (opciones: {', '.join(ESTRATEGIAS)})")
+    return importlib.import_module(ESTRATEGIAS[nombre])
+
+
+def select_branch(registro):
+    """Sucursal de la sesión: ?sucursal=<nombre>, o el selector si hay varias."""
+    sucursales = registro.sucursales()
+    if st.session_state.get("sucursal") not in sucursales:
+        pedida = st.query_params.get("sucursal", SUCURSAL_PRINCIPAL)
+        st.session_state["sucursal"] = pedida if pedida in sucursales else SUCURSAL_PRINCIPAL
+    if len(sucursales) > 1:
+        st.selectbox("Sucursal", sucursales, key="sucursal")
+    return st.session_state["sucursal"]
+
+
+def main():
+    """Una corrida de Streamlit: página común y la estrategia configurada."""
+    # Configura el logger
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
+
+    # Configuración inicial de la página
+    st.set_page_config(page_title="SazónBot", page_icon=":pot_of_food:")
+    st.title("🍲 SazónBot")
+    st.markdown(INTRO)
+
+    load_strategy(st.secrets.get("ESTRATEGIA", ESTRATEGIA_POR_DEFECTO)).run()
@@ -0,0 +1,51 @@
+import threading
+import time
+from collections import OrderedDict
+
+
+class TTLCache:
+    """Caché LRU con vencimiento por tiempo y métricas de aciertos."""
+
+    def __init__(self, max_size=512, ttl=600.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._datos = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "expirados": 0, "desalojados": 0}
+
+    def get(self, clave):
+        with self._lock:
+            entrada = self._datos.get(clave)
+            if entrada is None:
+                self.stats["misses"] += 1
+                return None
+            valor, vence = entrada
+            if vence < time.monotonic():
+                del self._datos[clave]
+                self.stats["expirados"] += 1
+                self.stats["misses"] += 1
+                return None
+            self._datos.move_to_end(clave)
+            self.stats["hits"] += 1
+            return valor
+
+    def put(self, clave, valor):
+        with self._lock:
+            self._datos[clave] = (valor, time.monotonic() + self.ttl)
+            self._datos.move_to_end(clave)
+            while len(self._datos) > self.max_size:
+                self._datos.popitem(last=False)
+                self.stats["desalojados"] += 1
+
+    def pop(self, clave):
+        with self._lock:
+            entrada = self._datos.pop(clave, None)
+        return None if entrada is None else entrada[0]
+
+    def __len__(self):
+        return len(self._datos)
+
+    @property
+    def hit_rate(self):
+        consultas = self.stats["hits"] + self.stats["misses"]
+        return self.stats["hits"] / consultas if consultas else 0.0
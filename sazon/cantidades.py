@@ -0,0 +1,145 @@
+import re
+
+from .indice import normalize
+
+# Límite por producto que el prompt del sistema le pide respetar al bot
+CANTIDAD_MINIMA = 1
+CANTIDAD_MAXIMA = 100
+MENSAJE_LIMITE = (
+    "Lamento informarte que el límite máximo de cantidad por producto es de 100 unidades. "
+    "Por favor, reduce la cantidad para procesar tu pedido."
+)
+
+_UNIDADES = {
+    "un": 1, "uno": 1, "una": 1, "dos": 2, "tres": 3, "cuatro": 4, "cinco": 5,
+    "seis": 6, "siete": 7, "ocho": 8, "nueve": 9,
+}
+_ESPECIALES = {
+    "cero": 0, "diez": 10, "once": 11, "doce": 12, "trece": 13, "catorce": 14, "quince": 15,
+    "dieciseis": 16, "diecisiete": 17, "dieciocho": 18, "diecinueve": 19, "veinte": 20,
+    "veintiun": 21, "veintiuno": 21, "veintiuna": 21, "veintidos": 22, "veintitres": 23,
+    "veinticuatro": 24, "veinticinco": 25, "veintiseis": 26, "veintisiete": 27,
+    "veintiocho": 28, "veintinueve": 29, "cien": 100, "docena": 12,
+}
+_DECENAS = {
+    "treinta": 30, "cuarenta": 40, "cincuenta": 50, "sesenta": 60,
+    "setenta": 70, "ochenta": 80, "noventa": 90,
+}
+# Todas las palabras que pueden formar parte de una cantidad
+PALABRAS_NUMERO = frozenset(_UNIDADES) | frozenset(_ESPECIALES) | frozenset(_DECENAS) | {"ciento", "media"}
+# Palabras que unen ítems o rellenan el nombre y no forman parte del plato
+_CONECTORES = {"y", "e", "con", "mas", "tambien", "ademas", ",", ";"}
+_RELLENO = {
+    "de", "del", "platos", "plato", "porciones", "porcion", "unidades", "unidad",
+    "quiero", "quisiera", "deseo", "me", "das", "da", "por", "favor", "pedir", "porfa",
+}
+# Mensajes más largos que esto (en tokens) no se interpretan localmente
+MAX_TOKENS = 80
+# Cifras pegadas a una unidad ("355ml", "1.5 l") son parte del nombre, no cantidades
+_TOKEN = re.compile(r"\d+(?:[.,]\d+)?\s*(?:ml|cl|lt|l|litros?|oz|gr|g|kg)\b|\d+|[^\W\d]+|[,;]")
+
+
+def _normalizar_token(token):
+    if token in (",", ";"):
+        return token
+    if token[0].isdigit():
+        # "355 ml" -> "355ml", como queda el nombre de la carta al normalizarlo
+        return normalize(token).replace(" ", "")
+    return normalize(token)
+
+
+def _leer_numero(tokens, i):
+    """Lee un número en cifras o palabras desde tokens[i]; devuelve (valor, siguiente) o None."""
+    token = tokens[i]
+    if token.isdigit():
+        return int(token), i + 1
+    if token == "ciento":
+        valor, j = 100, i + 1
+        resto = _leer_numero(tokens, j) if j < len(tokens) else None
+        return (valor + resto[0], resto[1]) if resto else (valor, j)
+    if token == "media" and i + 1 < len(tokens) and tokens[i + 1] == "docena":
+        return 6, i + 2
+    if token in _ESPECIALES:
+        return _ESPECIALES[token], i + 1
+    if token in _UNIDADES:
+        return _UNIDADES[token], i + 1
+    if token in _DECENAS:
+        valor = _DECENAS[token]
+        # "treinta y dos"
+        if i + 2 < len(tokens) and tokens[i + 1] == "y" and tokens[i + 2] in _UNIDADES:
+            return valor + _UNIDADES[tokens[i + 2]], i + 3
+        return valor, i + 1
+    return None
+
+
+def _es_cantidad(tokens, i):
+    """Las cifras siempre son cantidades; las palabras solo al inicio o tras un conector.
+
+    Así "torta tres leches" no se lee como tres unidades de "leches".
+    """
+    return tokens[i].isdigit() or i == 0 or tokens[i - 1] in _CONECTORES or tokens[i - 1] in _RELLENO
+
+
+def _buscar(palabras, indice):
+    """Busca el ítem más largo que empiece el nombre, quitando palabras del final.
+
+    Los candidatos no pasan del nombre más largo de la carta: cada uno es una
+    búsqueda difusa y los mensajes largos no deben costar una por palabra.
+    """
+    while palabras and (palabras[0] in _RELLENO or palabras[0] in _CONECTORES):
+        palabras = palabras[1:]
+    for fin in range(min(len(palabras), indice.max_palabras), 0, -1):
+        candidato = palabras[:fin]
+        if candidato[-1] in _CONECTORES or candidato[-1] in _RELLENO:
+            continue
+        entrada = indice.match(" ".join(candidato))
+        if entrada is not None:
+            return entrada
+    return None
+
+
+def parse_quantities(texto, indice):
+    """Extrae pares (cantidad, Entrada) de un mensaje como "dos arroz con pollo y 1 chicha".
+
+    Devuelve (pares, errores): los errores son textos para el cliente cuando una
+    cantidad está fuera del rango 1-100 o un nombre no está en la carta.
+    Los mensajes de más de MAX_TOKENS tokens se dejan al modelo: ([], []).
+    """
+    tokens = _TOKEN.findall(texto.lower())
+    if len(tokens) > MAX_TOKENS:
+        return [], []
+    tokens = [_normalizar_token(t) for t in tokens]
+    # Posiciones donde empieza cada cantidad
+    cantidades = []
+    i = 0
+    while i < len(tokens):
+        numero = _leer_numero(tokens, i) if _es_cantidad(tokens, i) else None
+        if numero is None:
+            i += 1
+            continue
+        cantidades.append((i, numero[0], numero[1]))
+        i = numero[1]
+
+    pares, errores = [], []
+    if not cantidades:
+        entrada = _buscar(tokens, indice)
+        return ([(1, entrada)] if entrada is not None else []), errores
+
+    for n, (_, cantidad, fin) in enumerate(cantidades):
+        siguiente = cantidades[n + 1][0] if n + 1 < len(cantidades) else len(tokens)
+        palabras = tokens[fin:siguiente]
+        if not palabras:
+            continue
+        entrada = _buscar(palabras, indice)
+        if entrada is None:
+            nombre = " ".join(p for p in palabras if p not in _CONECTORES)
+            errores.append(f"No encontramos \"{nombre}\" en la carta.")
+            continue
+        if cantidad > CANTIDAD_MAXIMA:
+            errores.append(MENSAJE_LIMITE)
+            continue
+        if cantidad < CANTIDAD_MINIMA:
+            errores.append(f"La cantidad de {entrada.nombre} debe ser al menos {CANTIDAD_MINIMA}.")
+            continue
+        pares.append((cantidad, entrada))
+    return pares, errores
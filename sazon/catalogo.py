@@ -0,0 +1,188 @@
+import functools
+import hashlib
+import io
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+
+import pandas as pd
+
+from .cache import TTLCache
+
+# Archivos que forman la carta de Sazón
+ARCHIVOS = {
+    "menu": "carta.csv",
+    "distritos": "distritos.csv",
+    "bebidas": "Bebidas.csv",
+    "postres": "Postres.csv",
+}
+# La sucursal principal usa los CSV del directorio de la app; el resto, sucursales/<nombre>/
+SUCURSAL_PRINCIPAL = "principal"
+DIRECTORIO_SUCURSALES = os.environ.get("SAZON_SUCURSALES", "sucursales")
+MAX_SUCURSALES = int(os.environ.get("SAZON_MAX_SUCURSALES", 8))
+# Versiones de la carta con índices, prompts, etc. en memoria (varias por sucursal activa)
+MAX_VERSIONES = 2 * MAX_SUCURSALES
+_NOMBRE_SUCURSAL = re.compile(r"^[\w-]+$")
+
+
+@dataclass(frozen=True)
+class Carta:
+    """Versión inmutable del catálogo: menú, distritos, bebidas y postres."""
+    version: str
+    menu: pd.DataFrame
+    distritos: pd.DataFrame
+    bebidas: pd.DataFrame
+    postres: pd.DataFrame
+
+
+class Catalogo:
+    """Catálogo compartido por todo el proceso que solo relee un CSV cuando cambia."""
+
+    def __init__(self, directorio=".", archivos=None):
+        self.directorio = directorio
+        self.archivos = dict(archivos or ARCHIVOS)
+        self._lock = threading.Lock()
+        self._firmas = {}   # nombre -> (mtime_ns, tamaño)
+        self._hashes = {}   # nombre -> sha1 del contenido
+        self._frames = {}   # nombre -> DataFrame
+        self._carta = None
+        self.stats = {"hits": 0, "recargas": 0, "tiempo_carga": 0.0}
+
+    def _ruta(self, nombre):
+        return os.path.join(self.directorio, self.archivos[nombre])
+
+    def _recargar(self, nombre, firma):
+        """Lee el archivo; devuelve True si su contenido cambió."""
+        ruta = self._ruta(nombre)
+        with open(ruta, "rb") as f:
+            contenido = f.read()
+        digest = hashlib.sha1(contenido).hexdigest()
+        self._firmas[nombre] = firma
+        if self._hashes.get(nombre) == digest:
+            # Solo cambió el mtime (por ejemplo un `touch`), no hace falta parsear
+            return False
+        inicio = time.perf_counter()
+        # Se parsean los mismos bytes del hash: una escritura entre dos lecturas
+        # dejaría la versión vieja con el contenido nuevo
+        self._frames[nombre] = pd.read_csv(io.BytesIO(contenido))
+        self.stats["tiempo_carga"] += time.perf_counter() - inicio
+        self.stats["recargas"] += 1
+        self._hashes[nombre] = digest
+        return True
+
+    def actual(self):
+        """Devuelve la Carta vigente, recargando solo los archivos modificados."""
+        with self._lock:
+            cambios = False
+            for nombre in self.archivos:
+                st_info = os.stat(self._ruta(nombre))
+                firma = (st_info.st_mtime_ns, st_info.st_size)
+                if self._firmas.get(nombre) != firma:
+                    cambios = self._recargar(nombre, firma) or cambios
+            if cambios or self._carta is None:
+                version = hashlib.sha1(
+                    "".join(self._hashes[n] for n in self.archivos).encode()
+                ).hexdigest()[:12]
+                self._carta = Carta(version=version, **self._frames)
+            else:
+                self.stats["hits"] += 1
+            return self._carta
+
+
+_catalogos = {}
+_catalogos_lock = threading.Lock()
+
+
+def get_catalogo(directorio="."):
+    """Devuelve el Catálogo compartido del proceso para el directorio dado."""
+    clave = os.path.abspath(directorio)
+    with _catalogos_lock:
+        if clave not in _catalogos:
+            _catalogos[clave] = Catalogo(directorio)
+        return _catalogos[clave]
+
+
+class CatalogRegistry:
+    """Catálogos por sucursal, cargados al primer uso y desalojados por LRU.
+
+    Cada sucursal tiene su propio Catalogo (que solo relee los CSV modificados);
+    si hay más de `max_sucursales` cargadas se suelta la menos usada.
+    """
+
+    def __init__(self, raiz=DIRECTORIO_SUCURSALES, principal=".", max_sucursales=MAX_SUCURSALES):
+        self.raiz = raiz
+        self.principal = principal
+        self.max_sucursales = max_sucursales
+        self._catalogos = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {"cargas": 0, "desalojos": 0}
+
+    def directorio(self, sucursal):
+        if sucursal == SUCURSAL_PRINCIPAL:
+            return self.principal
+        if not _NOMBRE_SUCURSAL.match(sucursal):
+            raise KeyError(f"Sucursal inválida: {sucursal!r}")
+        directorio = os.path.join(self.raiz, sucursal)
+        if not os.path.isdir(directorio):
+            raise KeyError(f"Sucursal desconocida: {sucursal!r}")
+        return directorio
+
+    def sucursales(self):
+        """Sucursales disponibles: la principal y cada subdirectorio de `raiz`."""
+        otras = sorted(
+            nombre for nombre in os.listdir(self.raiz)
+            if _NOMBRE_SUCURSAL.match(nombre) and os.path.isdir(os.path.join(self.raiz, nombre))
+        ) if os.path.isdir(self.raiz) else []
+        return [SUCURSAL_PRINCIPAL, *(n for n in otras if n != SUCURSAL_PRINCIPAL)]
+
+    def get(self, sucursal=SUCURSAL_PRINCIPAL):
+        """Catalogo de la sucursal; se crea (sin leer aún los CSV) la primera vez."""
+        with self._lock:
+            catalogo = self._catalogos.get(sucursal)
+            if catalogo is None:
+                catalogo = Catalogo(self.directorio(sucursal))
+                self._catalogos[sucursal] = catalogo
+                self.stats["cargas"] += 1
+                while len(self._catalogos) > self.max_sucursales:
+                    self._catalogos.popitem(last=False)
+                    self.stats["desalojos"] += 1
+            self._catalogos.move_to_end(sucursal)
+            return catalogo
+
+    def actual(self, sucursal=SUCURSAL_PRINCIPAL):
+        """Carta vigente de la sucursal."""
+        return self.get(sucursal).actual()
+
+
+_registro = None
+
+
+def get_registry():
+    """Registro de sucursales compartido por el proceso."""
+    global _registro
+    with _catalogos_lock:
+        if _registro is None:
+            _registro = CatalogRegistry()
+        return _registro
+
+
+def per_version(fn):
+    """Memoriza fn(carta) por versión de la carta.
+
+    La versión es el hash del contenido, así que cada sucursal tiene sus propias
+    entradas; se conservan las MAX_VERSIONES usadas más recientemente.
+    """
+    cache = TTLCache(max_size=MAX_VERSIONES, ttl=float("inf"))
+
+    @functools.wraps(fn)
+    def wrapper(carta):
+        valor = cache.get(carta.version)
+        if valor is None:
+            valor = fn(carta)
+            cache.put(carta.version, valor)
+        return valor
+    wrapper.cache = cache
+    return wrapper
@@ -0,0 +1,107 @@
+import atexit
+import json
+import logging
+import queue
+import threading
+import time
+
+from .almacen import get_store
+
+
+class WriteBehindQueue:
+    """Cola acotada con un hilo que escribe los registros en lotes.
+
+    `put` solo encola; el hilo llama a `sink(lote)` cuando junta `batch_size`
+    registros o pasan `flush_interval` segundos. Si la cola se llena, `put`
+    espera (contrapresión) y se cuenta en las métricas.
+    """
+
+    def __init__(self, sink, max_size=10000, batch_size=50, flush_interval=0.5, nombre="cola"):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self._cola = queue.Queue(maxsize=max_size)
+        self._cerrada = threading.Event()
+        self._lock = threading.Lock()
+        self.stats = {
+            "encolados": 0, "escritos": 0, "lotes": 0, "errores": 0,
+            "esperas_cola_llena": 0, "segundos_esperando": 0.0, "profundidad_max": 0,
+        }
+        self._hilo = threading.Thread(target=self._trabajar, name=f"sazon-{nombre}", daemon=True)
+        self._hilo.start()
+
+    def put(self, registro):
+        if self._cerrada.is_set():
+            raise RuntimeError("La cola ya se cerró")
+        try:
+            self._cola.put_nowait(registro)
+        except queue.Full:
+            inicio = time.perf_counter()
+            self._cola.put(registro)
+            with self._lock:
+                self.stats["esperas_cola_llena"] += 1
+                self.stats["segundos_esperando"] += time.perf_counter() - inicio
+        with self._lock:
+            self.stats["encolados"] += 1
+            self.stats["profundidad_max"] = max(self.stats["profundidad_max"], self._cola.qsize())
+
+    def _escribir(self, lote):
+        try:
+            self.sink(lote)
+            with self._lock:
+                self.stats["escritos"] += len(lote)
+                self.stats["lotes"] += 1
+        except Exception as e:
+            with self._lock:
+                self.stats["errores"] += 1
+            logging.error(f"Error al escribir un lote de {len(lote)} registros: {e}")
+
+    def _trabajar(self):
+        lote = []
+        limite = time.monotonic() + self.flush_interval
+        while True:
+            restante = limite - time.monotonic()
+            try:
+                lote.append(self._cola.get(timeout=max(restante, 0)))
+            except queue.Empty:
+                pass
+            vencido = time.monotonic() >= limite
+            if len(lote) >= self.batch_size or (vencido and lote):
+                self._escribir(lote)
+                lote = []
+            if vencido or not lote:
+                limite = time.monotonic() + self.flush_interval
+            if self._cerrada.is_set() and self._cola.empty():
+                if lote:
+                    self._escribir(lote)
+                return
+
+    @property
+    def pendientes(self):
+        return self._cola.qsize()
+
+    def close(self, timeout=5.0):
+        """Deja de aceptar registros y espera a que se escriba lo pendiente."""
+        self._cerrada.set()
+        self._hilo.join(timeout)
+        return not self._hilo.is_alive()
+
+
+def _guardar_pedidos(lote):
+    get_store().save_many(lote)
+    for order_json in lote:
+        logging.info(json.dumps(order_json, ensure_ascii=False, separators=(",", ":")))
+
+
+_cola_pedidos = None
+_cola_lock = threading.Lock()
+
+
+def get_order_queue():
+    """Cola compartida del proceso que guarda y registra los pedidos confirmados."""
+    global _cola_pedidos
+    with _cola_lock:
+        if _cola_pedidos is None:
+            _cola_pedidos = WriteBehindQueue(_guardar_pedidos, nombre="pedidos")
+            atexit.register(_cola_pedidos.close)
+        return _cola_pedidos
@@ -0,0 +1,66 @@
+import logging
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+# Pool compartido por todas las sesiones para la moderación y el primer fragmento
+_pool = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("SAZON_WORKERS", "16")),
+    thread_name_prefix="sazon",
+)
+# Trabajo en segundo plano (extraer y guardar pedidos, precalentar): pool aparte
+# para que una ráfaga de extracciones no demore la moderación de otros turnos
+_fondo = ThreadPoolExecutor(
+    max_workers=int(os.environ.get("SAZON_WORKERS_FONDO", "4")),
+    thread_name_prefix="sazon-fondo",
+)
+stats = {"moderadas": 0, "descartadas": 0, "canceladas": 0}
+_stats_lock = threading.Lock()
+
+
+def _contar(clave):
+    with _stats_lock:
+        stats[clave] += 1
+
+
+def moderated_stream(moderar, fragmentos, executor=None):
+    """Lanza la moderación a la vez que la respuesta que llega por fragmentos.
+
+    Mientras corre la moderación se pide el primer fragmento (que es cuando se
+    hace la llamada al modelo). Si el mensaje se marca, el generador se cierra
+    y con él la conexión. Devuelve (flagged, iterador de fragmentos).
+    `executor` reemplaza al pool compartido (p. ej. el de la API).
+    """
+    pool = executor or _pool
+    moderacion = pool.submit(moderar)
+    primero = pool.submit(next, fragmentos, None)
+    _contar("moderadas")
+    if moderacion.result():
+        if primero.cancel():
+            _contar("canceladas")
+            fragmentos.close()
+        else:
+            _contar("descartadas")
+            primero.add_done_callback(lambda _: fragmentos.close())
+        return True, None
+
+    def resto():
+        fragmento = primero.result()
+        if fragmento is None:
+            return
+        yield fragmento
+        yield from fragmentos
+
+    return False, resto()
+
+
+def _log_error(future):
+    if not future.cancelled() and future.exception() is not None:
+        logging.error(f"Error en tarea en segundo plano: {future.exception()}")
+
+
+def run_in_background(fn, *args, **kwargs):
+    """Ejecuta fn fuera del camino de la respuesta; los errores solo se registran."""
+    future = _fondo.submit(fn, *args, **kwargs)
+    future.add_done_callback(_log_error)
+    return future
@@ -0,0 +1,121 @@
+import logging
+import re
+
+from .catalogo import per_version
+
+# Aproximación de tokens sin depender de un tokenizador: ~4 caracteres por token
+CARACTERES_POR_TOKEN = 4
+# Marca de la tabla de resumen que el prompt pide recalcular en cada turno
+_TABLA_TOTAL = re.compile(r"\|\s*\**total\**\s*\|", re.IGNORECASE)
+_PAGOS = ("tarjeta", "efectivo", "yape", "plin")
+
+
+def count_tokens(texto):
+    """Estimación barata del número de tokens de un texto."""
+    return len(texto) // CARACTERES_POR_TOKEN + 1
+
+
+def count_message_tokens(messages):
+    # Unos pocos tokens extra por mensaje por el rol y los separadores
+    return sum(count_tokens(m["content"]) + 4 for m in messages)
+
+
+@per_version
+def _nombres(carta):
+    return {
+        "platos": [p.lower() for p in carta.menu["Plato"]],
+        "extras": [b.lower() for b in carta.bebidas["descripcion"]]
+        + [p.lower() for p in carta.postres["Postres"]],
+        "distritos": [d.lower() for d in carta.distritos["Distrito"]],
+    }
+
+
+class ContextWindow:
+    """Recorta el historial a un presupuesto de tokens resumiendo los turnos antiguos.
+
+    Siempre se envían el prompt del sistema, la última tabla de pedido y los
+    últimos `keep_turns` turnos completos; lo anterior se condensa en un
+    resumen estructurado que se actualiza de forma incremental.
+    """
+
+    def __init__(self, carta, token_budget=4000, keep_turns=6):
+        self.token_budget = token_budget
+        self.keep_turns = keep_turns
+        self.nombres = _nombres(carta)
+
+    def _fold(self, resumen, message):
+        """Incorpora un mensaje antiguo al resumen."""
+        texto = message["content"].lower()
+        for clave in ("platos", "extras", "distritos"):
+            for nombre in self.nombres[clave]:
+                if nombre in texto and nombre not in resumen[clave]:
+                    resumen[clave].append(nombre)
+        for pago in _PAGOS:
+            if pago in texto and pago not in resumen["pagos"]:
+                resumen["pagos"].append(pago)
+        if message["role"] == "user":
+            resumen["pedidos"] = (resumen["pedidos"] + [message["content"][:80]])[-5:]
+        if message["role"] == "assistant" and _TABLA_TOTAL.search(message["content"]):
+            resumen["tabla"] = message["content"]
+
+    @staticmethod
+    def _nuevo_resumen():
+        return {"hasta": 0, "platos": [], "extras": [], "distritos": [], "pagos": [], "pedidos": [], "tabla": None}
+
+    @staticmethod
+    def _texto_resumen(resumen):
+        partes = ["Resumen de la conversación anterior:"]
+        for clave, titulo in (
+            ("platos", "platos mencionados"),
+            ("extras", "bebidas y postres mencionados"),
+            ("distritos", "distritos mencionados"),
+            ("pagos", "métodos de pago mencionados"),
+        ):
+            if resumen[clave]:
+                partes.append(f"- {titulo}: {', '.join(resumen[clave])}")
+        if resumen["pedidos"]:
+            partes.append("- últimos mensajes del cliente: " + " / ".join(resumen["pedidos"]))
+        return "\n".join(partes)
+
+    def trim(self, messages, resumen):
+        """Devuelve (mensajes a enviar, cuentas de tokens).
+
+        `resumen` es un dict de la sesión que guarda el resumen acumulado;
+        se reinicia solo si el historial se borró.
+        """
+        system, historial = messages[:1], messages[1:]
+        if system and system[0]["role"] != "system":
+            system, historial = [], messages
+        if not resumen or resumen["hasta"] > len(historial):
+            resumen.clear()
+            resumen.update(self._nuevo_resumen())
+
+        # Los últimos turnos van completos; el resto se resume
+        inicio = max(resumen["hasta"], len(historial) - 2 * self.keep_turns)
+        while True:
+            for message in historial[resumen["hasta"]:inicio]:
+                self._fold(resumen, message)
+            resumen["hasta"] = max(resumen["hasta"], inicio)
+            extra = []
+            if resumen["hasta"]:
+                extra.append({"role": "system", "content": self._texto_resumen(resumen)})
+                tabla_reciente = any(
+                    m["role"] == "assistant" and _TABLA_TOTAL.search(m["content"])
+                    for m in historial[inicio:]
+                )
+                if resumen["tabla"] and not tabla_reciente:
+                    extra.append({"role": "system", "content": "Estado actual del pedido:\n" + resumen["tabla"]})
+            enviados = system + extra + historial[inicio:]
+            # Siempre se conserva al menos el último mensaje del cliente
+            if count_message_tokens(enviados) <= self.token_budget or inicio >= len(historial) - 1:
+                break
+            inicio += 1
+
+        cuentas = {
+            "tokens_completos": count_message_tokens(messages),
+            "tokens_enviados": count_message_tokens(enviados),
+            "mensajes_resumidos": resumen["hasta"],
+        }
+        cuentas["tokens_ahorrados"] = cuentas["tokens_completos"] - cuentas["tokens_enviados"]
+        logging.info(f"Contexto: {cuentas}")
+        return enviados, cuentas
@@ -0,0 +1,101 @@
+import streamlit as st
+import uuid
+from .app import select_branch
+from .catalogo import get_registry
+from .concurrencia import run_in_background
+from .stock import get_stock
+from .llm import backend_from_config
+from .metricas import Traza, configure as configure_metricas
+from .historial import MENSAJES_VISIBLES, render_history
+from .turnos import MENSAJE_RESPETO, Conversacion, new_state
+# Backend de LLM compartido por todas las sesiones (LLM_BACKEND: openai, groq o stub)
+backend = backend_from_config(st.secrets)
+# Moderación y respuesta en paralelo (se descarta la respuesta si el mensaje es inapropiado)
+MODERACION_CONCURRENTE = st.secrets.get("MODERACION_CONCURRENTE", True)
+# Presupuesto de tokens del historial enviado y turnos que se envían completos
+CONTEXTO_TOKENS = st.secrets.get("CONTEXTO_TOKENS", 4000)
+CONTEXTO_TURNOS = st.secrets.get("CONTEXTO_TURNOS", 6)
+# Mensajes que se dibujan como burbujas; los anteriores se pliegan en un solo bloque
+HISTORIAL_VISIBLE = st.secrets.get("HISTORIAL_VISIBLE", MENSAJES_VISIBLES)
+# Métricas por turno: líneas JSON en METRICAS_JSONL y/o texto Prometheus en METRICAS_HOST:METRICAS_PUERTO/metrics
+configure_metricas(
+    jsonl=st.secrets.get("METRICAS_JSONL"),
+    puerto=st.secrets.get("METRICAS_PUERTO"),
+    host=st.secrets.get("METRICAS_HOST", "127.0.0.1"),
+)
+conversacion = Conversacion(backend, CONTEXTO_TOKENS, CONTEXTO_TURNOS)
+
+
+def generate_response(prompt, carta, stock, traza, temperature=0,max_tokens=1000, moderate=False):
+    """Enviar el prompt al modelo y escribir la respuesta en el chat a medida que llega.
+
+    Con moderate=True la moderación corre en paralelo con la respuesta y se
+    devuelve None (sin escribir nada) si el prompt es inapropiado. El turno
+    (respuestas locales, prompt, extracción del pedido) está en turnos.Conversacion.
+    """
+    fragmentos = conversacion.respond(st.session_state, prompt, carta, stock, traza, moderate, temperature, max_tokens)
+    if fragmentos is None:
+        return None
+    with st.chat_message("assistant", avatar="👨‍🍳"):
+        return st.write_stream(fragmentos)
+
+
+def run():
+    """Conversación libre con el modelo: una corrida de Streamlit por mensaje."""
+    # Spans de este turno; ?perfilar=1 activa el perfilador por muestreo para la sesión
+    if st.query_params.get("perfilar") == "1":
+        st.session_state["perfilar"] = True
+    traza = Traza(st.session_state.setdefault("sesion_id", uuid.uuid4().hex[:12]), st.session_state.get("perfilar", False))
+
+    # Sucursal de la sesión (?sucursal=<nombre> o el selector); cada una tiene su propia carta
+    registro_sucursales = get_registry()
+    sucursal = select_branch(registro_sucursales)
+
+    # Cargar el menú y distritos de la sucursal (se carga al primer uso y solo se releen los CSV modificados)
+    with traza.span("catalogo", sucursal=sucursal):
+        carta = registro_sucursales.actual(sucursal)
+        # Unidades por plato de la sucursal; los pedidos confirmados las descuentan
+        stock = get_stock(sucursal, carta)
+
+    # Cada sesión guarda solo sus turnos; el prompt y la bienvenida con el menú se comparten por versión.
+    # Al cambiar de sucursal la conversación empieza de nuevo con la carta de esa sucursal.
+    if st.session_state.get("sucursal_conversacion") != sucursal:
+        st.session_state.update(new_state(carta))
+        st.session_state["sucursal_conversacion"] = sucursal
+
+    # eliminar conversación
+    clear_button = st.button("Eliminar conversación", key="clear")
+    if clear_button:
+        st.session_state.update(new_state(carta))
+
+    # Display chat messages from history on app rerun (solo se preparan los mensajes nuevos)
+    with traza.span("historial", mensajes=len(st.session_state.messages)):
+        render_history(st.session_state.messages, carta, st.session_state.setdefault("historial", {}), HISTORIAL_VISIBLE)
+
+    if prompt := st.chat_input():
+        if MODERACION_CONCURRENTE:
+            # Mostramos el mensaje mientras corren moderación y respuesta; se retira si es inapropiado
+            user_bubble = st.empty()
+            with user_bubble.container():
+                with st.chat_message("user", avatar="👤"):
+                    st.markdown(prompt)
+            output = generate_response(prompt, carta, stock, traza, moderate=True)
+            if output is None:
+                user_bubble.empty()
+                with st.chat_message("assistant", avatar="👨‍🍳"):
+                    st.markdown(MENSAJE_RESPETO)
+
+        # Verificar si el contenido es inapropiado
+        elif conversacion.check(prompt, carta, traza):
+            with st.chat_message("assistant", avatar="👨‍🍳"):
+                st.markdown(MENSAJE_RESPETO)
+
+        else:
+            with st.chat_message("user", avatar="👤"):
+                st.markdown(prompt)
+            generate_response(prompt, carta, stock, traza)
+
+    # Cerrar la traza del turno (exporta el resumen y el perfil si está activo)
+    traza.finish()
+    # El cliente del LLM se construye en segundo plano, ya con la página dibujada
+    run_in_background(backend.warm)
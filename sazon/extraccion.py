@@ -0,0 +1,109 @@
+import re
+import unicodedata
+
+# Marca que el prompt del sistema exige solo en la confirmación final del pedido
+_MARCA = re.compile(r"timestamp\s*confirmacion", re.IGNORECASE)
+_NUMERO = re.compile(r"\d[\d.,]*")
+_CAMPOS = {
+    "metodo de pago": "Metodo de Pago",
+    "lugar de entrega": "Lugar de Entrega",
+    "timestamp confirmacion": "Timestamp Confirmacion",
+}
+_CAMPO = re.compile(
+    r"^[\s*\-•_]*(m[eé]todo de pago|lugar de entrega|timestamp confirmaci[oó]n)[\s*_]*:[\s*_]*(.+?)[\s*_]*$",
+    re.IGNORECASE,
+)
+
+
+def _sin_tildes(texto):
+    return "".join(
+        c for c in unicodedata.normalize("NFD", texto) if unicodedata.category(c) != "Mn"
+    )
+
+
+def _numero(celda):
+    """Número de una celda ("S/ 1,500.00", "12,50", "2"); el último separador es el decimal
+    salvo que le sigan tres dígitos ("1,500" o "1.500" son miles)."""
+    encontrado = _NUMERO.search(celda)
+    if encontrado is None:
+        return None
+    texto = encontrado.group().rstrip(".,")
+    corte = max(texto.rfind("."), texto.rfind(","))
+    if corte == -1 or len(texto) - corte - 1 == 3:
+        return float(re.sub(r"[.,]", "", texto))
+    return float(re.sub(r"[.,]", "", texto[:corte]) + "." + texto[corte + 1:])
+
+
+def parse_amount(valor):
+    """Número de un campo del JSON del pedido: números tal cual, textos como "S/ 26.00"
+    con el mismo parser de la tabla; None si no hay número."""
+    if isinstance(valor, (int, float)) and not isinstance(valor, bool):
+        return valor
+    return _numero(valor) if isinstance(valor, str) else None
+
+
+def _celdas(linea):
+    return [c.strip().strip("*").strip() for c in linea.strip().strip("|").split("|")]
+
+
+def has_confirmation_marker(response):
+    """Indica si la respuesta parece la confirmación final del pedido."""
+    return bool(_MARCA.search(_sin_tildes(response)))
+
+
+def _parse(response):
+    """Lee las filas de la tabla de pedido, el total y los campos de confirmación."""
+    platos = []
+    total = None
+    campos = {}
+    en_tabla = False
+    for linea in response.splitlines():
+        linea_limpia = linea.strip()
+        if linea_limpia.startswith("|"):
+            celdas = _celdas(linea_limpia)
+            if len(celdas) < 3 or set(celdas[0]) <= set("-: "):
+                continue
+            nombre = celdas[0]
+            if nombre.lower() == "plato":
+                # Solo interesan las tablas de pedido, no la carta (Plato | Descripción | Precio)
+                en_tabla = _sin_tildes(celdas[1]).lower() == "cantidad"
+                if en_tabla:
+                    platos, total = [], None
+                continue
+            if not en_tabla:
+                continue
+            if nombre.lower() == "total":
+                total = _numero(celdas[-1])
+                continue
+            cantidad = _numero(celdas[1])
+            precio = _numero(celdas[2])
+            if cantidad is None or precio is None:
+                continue
+            platos.append({"Plato": nombre, "Cantidad": int(cantidad), "Precio Total": precio})
+            continue
+        en_tabla = False
+        campo = _CAMPO.match(linea_limpia)
+        if campo:
+            valor = campo.group(2).strip().rstrip(".").strip("'\" ")
+            if valor:
+                campos[_CAMPOS[_sin_tildes(campo.group(1)).lower()]] = valor
+    return platos, total, campos
+
+
+def parse_order_table(response):
+    """Filas {Plato, Cantidad, Precio Total} de la última tabla de pedido de la respuesta."""
+    platos, _, _ = _parse(response)
+    return platos
+
+
+def parse_confirmed_order(response):
+    """Arma el JSON del pedido confirmado leyendo la tabla Markdown de la respuesta.
+
+    Devuelve None si la tabla o alguno de los campos no se pueden leer.
+    """
+    platos, total, campos = _parse(response)
+    if not platos or len(campos) < len(_CAMPOS):
+        return None
+    if total is None:
+        total = sum(p["Precio Total"] for p in platos)
+    return {"Platos": platos, "Total": total, **campos}
@@ -0,0 +1,99 @@
+import re
+
+from .cache import TTLCache
+from .indice import get_index, normalize
+from .metricas import registro
+from .pedido import find_district
+from .render import format_bebidas_table, format_menu_table, format_postres_table
+
+# Preguntas frecuentes más largas que esto se dejan al modelo
+MAX_CARACTERES = 90
+
+# Saludos o muletillas permitidos antes de la pregunta; cualquier otra cosa va al modelo
+_INICIO = r"^(?:(?:hola|oye|oiga|disculpa|disculpe|y|ustedes|una pregunta)\s+)*"
+_PRECIO = re.compile(_INICIO + r"(?:cuanto (?:cuesta|cuestan|vale|valen|sale|esta|es)|precio de(?:l)?|a como (?:esta|sale))\s+(?:el |la |los |las |un |una )?(.+)")
+# El lugar es una frase corta al final ("reparten a la molina"); "llegan frios los platos" va al modelo
+_REPARTO = re.compile(_INICIO + r"(?:reparten|repartes|llegan|entregan|envian|hacen delivery|hay delivery|delivery)(?:\s+(?:a|en|hasta|para)\s+(\w+(?: \w+){0,3}))?$")
+_CARTA = re.compile(_INICIO + r"(?:(?:que|q) (?:hay|tienen|ofrecen|platos hay|platos tienen)(?: hoy| de almuerzo| para almorzar| en (?:la carta|el menu))?|(?:ver|muestrame|ensename|mandame|pasame|dame) (?:la )?(?:carta|menu)|(?:la )?(?:carta|menu)(?: del dia| de hoy)?|cual es (?:la carta|el menu)(?: del dia| de hoy)?)$")
+_BEBIDAS = re.compile(_INICIO + r"(?:(?:que|q|cuales) (?:bebidas|refrescos)(?: hay| tienen)?|(?:la )?(?:carta de )?bebidas)$")
+_POSTRES = re.compile(_INICIO + r"(?:(?:que|q|cuales) postres(?: hay| tienen)?|(?:la )?(?:carta de )?postres)$")
+
+
+# Respuestas por (versión de la carta, texto normalizado) y por (versión, intención)
+_por_texto = TTLCache()
+_por_intencion = TTLCache()
+
+
+def _limpiar(pregunta):
+    return normalize(pregunta).removesuffix(" por favor").strip()
+
+
+def _intencion(texto, carta):
+    """Devuelve (intención, argumento) o None si no es una pregunta frecuente."""
+    if _CARTA.match(texto):
+        return ("carta", None)
+    if _BEBIDAS.match(texto):
+        return ("bebidas", None)
+    if _POSTRES.match(texto):
+        return ("postres", None)
+    precio = _PRECIO.match(texto)
+    if precio:
+        entrada = get_index(carta).match(precio.group(1))
+        return ("precio", entrada.nombre) if entrada is not None else None
+    reparto = _REPARTO.match(texto)
+    if reparto:
+        if reparto.group(1) is None:
+            return ("distritos", None)
+        # Solo distritos conocidos: cualquier otra zona la responde el modelo
+        distrito = find_district(reparto.group(1), carta)
+        return ("reparto", distrito) if distrito is not None else None
+    return None
+
+
+def _responder(intencion, argumento, carta):
+    distritos = carta.distritos["Distrito"].tolist()
+    if intencion == "carta":
+        return f"Este es el menú del día:\n\n{format_menu_table(carta.menu)}\n\n¿Qué te puedo ofrecer?"
+    if intencion == "bebidas":
+        return f"Estas son nuestras bebidas:\n\n{format_bebidas_table(carta.bebidas)}\n\n¿Deseas agregar alguna a tu pedido?"
+    if intencion == "postres":
+        return f"Estos son nuestros postres:\n\n{format_postres_table(carta.postres)}\n\n¿Deseas agregar alguno a tu pedido?"
+    if intencion == "precio":
+        entrada = get_index(carta).lookup(argumento)
+        return f"{entrada.nombre} cuesta S/{entrada.precio:.2f}. ¿Deseas agregarlo a tu pedido?"
+    lista = ", ".join(distritos)
+    if intencion == "distritos":
+        return f"Repartimos en los siguientes distritos: {lista}. También puedes recoger tu pedido en nuestro local ubicado en UPCH123."
+    return f"¡Sí! Repartimos en {argumento}. ¿Qué te gustaría pedir?"
+
+
+def answer_faq(pregunta, carta):
+    """Respuesta desde la carta para preguntas frecuentes, o None para usar el modelo."""
+    if len(pregunta) > MAX_CARACTERES:
+        return None
+    texto = _limpiar(pregunta)
+    clave = (carta.version, texto)
+    respuesta = _por_texto.get(clave)
+    if respuesta is not None:
+        return respuesta
+    intencion = _intencion(texto, carta)
+    if intencion is None:
+        return None
+    clave_intencion = (carta.version, *intencion)
+    respuesta = _por_intencion.get(clave_intencion)
+    if respuesta is None:
+        respuesta = _responder(*intencion, carta)
+        _por_intencion.put(clave_intencion, respuesta)
+    _por_texto.put(clave, respuesta)
+    return respuesta
+
+
+def faq_stats():
+    """Métricas de las dos capas del caché de preguntas frecuentes."""
+    return {
+        "texto": {**_por_texto.stats, "hit_rate": _por_texto.hit_rate},
+        "intencion": {**_por_intencion.stats, "hit_rate": _por_intencion.hit_rate},
+    }
+
+
+registro.register("faq_cache", faq_stats, etiqueta="capa")
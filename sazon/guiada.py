@@ -0,0 +1,160 @@
+import logging
+import uuid
+
+import streamlit as st
+from .app import select_branch
+from .render import format_menu, format_order_table
+from .pedido import Pedido, find_district, order_from_text
+from .catalogo import get_registry
+from .cantidades import MENSAJE_LIMITE
+from .cola import get_order_queue
+from .llm import backend_from_config
+from .metricas import Traza
+from .stock import MENSAJE_AGOTADO, get_stock
+from .turnos import MENSAJE_RESPETO, check_for_inappropriate_content
+
+# Backend de LLM compartido por todas las sesiones
+backend = backend_from_config(st.secrets)
+
+# Mensaje de sistema del modelo que interpreta el pedido
+PARSEO = "You are a helpful assistant for a food ordering service."
+
+
+def initial_state(menu):
+    return [
+        {"role": "system", "content": "You are SazónBot. A friendly assistant helping customers with their lunch orders."},
+        {
+            "role": "assistant",
+            "content": f"👨‍🍳¿Qué te puedo ofrecer?\n\nEste es el menú del día:\n\n{format_menu(menu)}",
+        },
+    ]
+
+# Función para guardar los pedidos
+def save_order(pedido, carta, stock):
+    """Encola el pedido y lo descuenta del stock de la sucursal."""
+    order_json = pedido.to_json()
+    # Primero se guarda: un error en el stock no debe perder el pedido
+    get_order_queue().put(order_json)
+    try:
+        stock.confirm(order_json, carta)
+    except (TypeError, ValueError) as e:
+        logging.error(f"No se pudo descontar del stock el pedido guiado: {e}")
+
+def parse_order(user_input, carta):
+    """Interpreta cantidades y platos localmente; el modelo solo si no se reconoce nada."""
+    pedido, errores = order_from_text(user_input, carta)
+    if pedido or errores:
+        return pedido, errores
+    parsed_message = backend.complete(
+        [{"role": "system", "content": PARSEO},
+         {"role": "user", "content": f"Extrae la cantidad y el plato de la siguiente solicitud: '{user_input}'.Limitate a solo devolver la cantidad y el plato de la solicitud sin un caracter adicional."}],
+        task="parseo",
+        temperature=0.5,
+        max_tokens=150,
+        top_p=1,
+        stop=None,
+    ).strip()
+    # Validar el pedido que devolvió el modelo con el mismo parser
+    pedido, _ = order_from_text(parsed_message, carta)
+    return pedido, []
+
+
+def run():
+    """Flujo guiado: pedido, confirmación y distrito de entrega, paso a paso."""
+    traza = Traza(st.session_state.setdefault("sesion_id", uuid.uuid4().hex[:12]))
+    # Carta y stock de la sucursal, como en la conversación libre
+    registro_sucursales = get_registry()
+    sucursal = select_branch(registro_sucursales)
+    with traza.span("catalogo", sucursal=sucursal):
+        carta = registro_sucursales.actual(sucursal)
+        stock = get_stock(sucursal, carta)
+    menu = carta.menu
+    districts = carta.distritos['Distrito'].tolist()
+
+    # Inicializar la conversación si no existe en la sesión o si cambió la sucursal
+    if "messages" not in st.session_state or st.session_state.get("sucursal_conversacion") != sucursal:
+        st.session_state["messages"] = initial_state(menu)
+        st.session_state["pedido"] = Pedido()
+        st.session_state["sucursal_conversacion"] = sucursal
+
+    # Botón para limpiar la conversación
+    clear_button = st.button("Limpiar Conversación", key="clear")
+    if clear_button:
+        st.session_state["messages"] = initial_state(menu)
+        st.session_state["pedido"] = Pedido()
+
+    # Mostrar el historial de la conversación
+    for message in st.session_state.messages:
+        if message["role"] == "system":
+            continue
+        with st.chat_message(message["role"], avatar="🍲" if message["role"] == "assistant" else "👤"):
+            st.markdown(message["content"])
+
+    # Entrada del usuario para el pedido
+    if user_input := st.chat_input("¿Qué te gustaría pedir?"):
+        if check_for_inappropriate_content(backend, user_input, carta, traza):
+            with st.chat_message("assistant", avatar="🍲"):
+                st.markdown(MENSAJE_RESPETO)
+            traza.finish()
+            return
+        with st.chat_message("user", avatar="👤"):
+            st.markdown(user_input)
+
+        pedido, errores = parse_order(user_input, carta)
+        sin_stock = [nombre for nombre in (pedido.cantidades() if pedido else {}) if not stock.is_available(nombre)]
+        if MENSAJE_LIMITE in errores:
+            response_text = MENSAJE_LIMITE
+        elif sin_stock:
+            response_text = MENSAJE_AGOTADO.format(platos=", ".join(sin_stock))
+        elif pedido:
+            # Guardar el pedido en el estado
+            st.session_state["pedido"] = pedido
+
+            # Solicitar confirmación del pedido
+            response_text = f"Tu pedido ha sido registrado:\n\n{format_order_table(pedido.cantidades())}\n\n¿Está correcto? (Sí o No)"
+        else:
+            # Si el plato no existe, mostrar el menú de nuevo
+            response_text = f"Uno o más platos no están disponibles. Aquí está el menú otra vez:\n\n{format_menu(menu)}"
+
+        # Mostrar la respuesta del asistente
+        with st.chat_message("assistant", avatar="🍲"):
+            st.markdown(response_text)
+
+    # Manejo de confirmación del pedido
+    if "pedido" in st.session_state and st.session_state["pedido"]:
+        if confirmation_input := st.chat_input("¿Está correcto? (Sí o No)"):
+            with st.chat_message("user", avatar="👤"):
+                st.markdown(confirmation_input)
+
+            # Confirmar pedido
+            if confirmation_input.lower() == "si":
+                response_text = "Por favor selecciona un distrito de entrega:"
+                response_text += f"\n\nEstos son los distritos disponibles: {', '.join(districts)}"
+                with st.chat_message("assistant", avatar="🍲"):
+                    st.markdown(response_text)
+
+                if district_input := st.chat_input("Ingresa el distrito:"):
+                    with st.chat_message("user", avatar="👤"):
+                        st.markdown(district_input)
+
+                    # Verificar si el distrito es válido
+                    distrito = find_district(district_input, carta)
+                    if distrito:
+                        response_text = f"Gracias por proporcionar tu distrito: {distrito}. Procederemos a entregar tu pedido allí. ¡Que disfrutes de tu almuerzo!"
+                        pedido = st.session_state["pedido"]
+                        pedido.entrega = "delivery"
+                        pedido.distrito = distrito
+                        save_order(pedido, carta, stock)
+                        st.session_state["pedido"] = Pedido()
+                    else:
+                        response_text = f"Lo siento, no entregamos en ese distrito. Estos son los distritos disponibles: {', '.join(districts)}"
+
+                    with st.chat_message("assistant", avatar="🍲"):
+                        st.markdown(response_text)
+
+            elif confirmation_input.lower() == "no":
+                response_text = "Entiendo, puedes volver a hacer tu pedido."
+                with st.chat_message("assistant", avatar="🍲"):
+                    st.markdown(response_text)
+
+    traza.finish()
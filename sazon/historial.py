@@ -0,0 +1,74 @@
+from dataclasses import dataclass
+
+import streamlit as st
+
+from .render import format_menu_table
+
+AVATARES = {"assistant": "👨‍🍳", "user": "👤"}
+_NOMBRES = {"assistant": "SazónBot", "user": "Tú"}
+# Mensajes que se muestran como burbujas; los anteriores van plegados en un solo bloque
+MENSAJES_VISIBLES = 12
+
+
+@dataclass(frozen=True)
+class Fragmento:
+    rol: str
+    partes: tuple      # (texto, es_menu); la tabla del menú va aparte para plegarla
+    resumen: str       # versión en una línea para el bloque de mensajes anteriores
+
+
+def _fragmento(message, carta):
+    """Prepara un mensaje para mostrarlo; se calcula una sola vez por mensaje."""
+    rol, content = message["role"], message["content"]
+    # format_menu_table está memorizado por DataFrame: una tabla por versión de la carta
+    antes, tabla, despues = content.partition(format_menu_table(carta.menu))
+    if tabla:
+        partes = ((antes.strip(), False), (tabla, True), (despues.strip(), False))
+        texto = f"{antes.strip()} _(menú del día)_ {despues.strip()}"
+    else:
+        partes = ((content, False),)
+        texto = content
+    return Fragmento(rol, partes, f"**{_NOMBRES.get(rol, rol)}:** {texto}\n\n")
+
+
+def _fragmentos(messages, carta, estado):
+    """Fragmentos del historial; solo se preparan los mensajes nuevos.
+
+    El historial solo crece, así que la posición identifica al mensaje. Si la
+    lista se reemplazó (conversación borrada) o cambió la carta, se empieza de nuevo.
+    """
+    cache = estado.get("fragmentos")
+    if estado.get("lista") is not messages or estado.get("version") != carta.version or len(cache) > len(messages):
+        cache = estado["fragmentos"] = []
+        estado.update(lista=messages, version=carta.version, anteriores=(0, ""))
+    for message in messages[len(cache):]:
+        cache.append(None if message["role"] == "system" else _fragmento(message, carta))
+    return [f for f in cache if f is not None]
+
+
+def render_history(messages, carta, estado, visibles=MENSAJES_VISIBLES):
+    """Dibuja el historial: los mensajes antiguos plegados en un bloque y los recientes como burbujas.
+
+    `estado` es un dict de la sesión donde se guardan los fragmentos ya preparados
+    y el texto acumulado del bloque de mensajes anteriores.
+    """
+    fragmentos = _fragmentos(messages, carta, estado)
+    corte = max(len(fragmentos) - visibles, 0)
+    if corte:
+        hasta, texto = estado["anteriores"]
+        if hasta > corte:
+            hasta, texto = 0, ""
+        # Solo se agrega al texto lo que pasó a ser "anterior" desde el último turno
+        texto += "".join(f.resumen for f in fragmentos[hasta:corte])
+        estado["anteriores"] = (corte, texto)
+        with st.expander(f"Mensajes anteriores ({corte})"):
+            st.markdown(texto)
+    for fragmento in fragmentos[corte:]:
+        with st.chat_message(fragmento.rol, avatar=AVATARES.get(fragmento.rol)):
+            for texto, es_menu in fragmento.partes:
+                if es_menu:
+                    # Abierto solo al inicio de la conversación
+                    with st.expander("Menú del día", expanded=len(fragmentos) == 1):
+                        st.markdown(texto)
+                elif texto:
+                    st.markdown(texto)
@@ -0,0 +1,130 @@
+import re
+import unicodedata
+from collections import Counter
+from dataclasses import dataclass
+
+from fuzzywuzzy import fuzz
+
+from .catalogo import per_version
+
+# Puntaje mínimo (0-100) para aceptar una sugerencia difusa como el ítem pedido
+CORTE_DIFUSO = 85
+# Candidatos por trigramas que se puntúan con _puntaje
+MAX_CANDIDATOS = 8
+_PUNTUACION = re.compile(r"[^\w\s]")
+_PARENTESIS = re.compile(r"\s*\(.*?\)")
+# Envase que el cliente suele omitir: "jarra de chicha morada" -> "chicha morada"
+_ENVASE = re.compile(r"^(?:jarra|vaso|botella|lata) (?:de|con) ")
+
+
+def normalize(texto):
+    """Minúsculas, sin tildes, sin puntuación y con espacios simples."""
+    sin_tildes = "".join(
+        c for c in unicodedata.normalize("NFD", str(texto)) if unicodedata.category(c) != "Mn"
+    )
+    return " ".join(_PUNTUACION.sub(" ", sin_tildes.casefold()).split())
+
+
+def _puntaje(consulta, clave):
+    """Parecido 0-100 entre una consulta y una clave del índice, ya normalizadas.
+
+    Una consulta de varias palabras que no tiene más palabras que la clave se
+    compara con token_set_ratio ("chicha morada" con "jarra de chicha morada 1l");
+    el resto con fuzz.ratio, para que "arroz chaufa con pollo" no se lea como
+    "arroz con pollo" ni "arroz" como cualquier arroz.
+    """
+    palabras = consulta.count(" ") + 1
+    if 1 < palabras <= clave.count(" ") + 1:
+        return fuzz.token_set_ratio(consulta, clave)
+    return fuzz.ratio(consulta, clave)
+
+
+def _trigramas(texto):
+    relleno = f"  {texto} "
+    return {relleno[i:i + 3] for i in range(len(relleno) - 2)}
+
+
+@dataclass(frozen=True)
+class Entrada:
+    nombre: str
+    precio: float
+    categoria: str   # "plato", "bebida" o "postre"
+
+
+class CatalogIndex:
+    """Índice de platos, bebidas y postres para búsquedas exactas y difusas."""
+
+    def __init__(self, carta):
+        self.version = carta.version
+        self.entradas = []
+        alias = {}
+        for categoria, nombres, precios, tipos in (
+            ("plato", carta.menu["Plato"], carta.menu["Precio"], None),
+            ("bebida", carta.bebidas["descripcion"], carta.bebidas["precio"], carta.bebidas["bebida"]),
+            ("postre", carta.postres["Postres"], carta.postres["Precio"], None),
+        ):
+            tipos = tipos.tolist() if tipos is not None else [None] * len(nombres)
+            for nombre, precio, tipo in zip(nombres.tolist(), precios.tolist(), tipos):
+                entrada = Entrada(nombre, float(precio), categoria)
+                self.entradas.append(entrada)
+                # Sin la presentación ni el envase: "Coca-Cola (355ml)" -> "coca cola",
+                # "Jarra de Chicha Morada (1L)" -> "chicha morada"; y el tipo de bebida ("chicha")
+                corto = normalize(_PARENTESIS.sub("", nombre))
+                for clave in (corto, _ENVASE.sub("", corto), tipo and normalize(tipo)):
+                    if clave:
+                        alias.setdefault(clave, set()).add(entrada)
+        # Claves de la búsqueda difusa y el ítem de cada una
+        self.claves = [normalize(e.nombre) for e in self.entradas]
+        self.de_clave = list(self.entradas)
+        # Palabras del nombre más largo: tope para los candidatos del parser de cantidades
+        self.max_palabras = max((len(c.split()) for c in self.claves), default=0)
+        self.exactos = {clave: e for clave, e in zip(self.claves, self.entradas)}
+        # Solo los alias que nombran un único ítem ("chicha" puede ser morada o de jora)
+        for clave, entradas in alias.items():
+            if len(entradas) == 1 and clave not in self.exactos:
+                entrada, = entradas
+                self.exactos[clave] = entrada
+                # También entran en la búsqueda difusa: "chicha morda" -> "chicha morada"
+                self.claves.append(clave)
+                self.de_clave.append(entrada)
+        self.trigramas = {}
+        for posicion, clave in enumerate(self.claves):
+            for trigrama in _trigramas(clave):
+                self.trigramas.setdefault(trigrama, []).append(posicion)
+
+    def lookup(self, nombre):
+        """Búsqueda exacta (tras normalizar) en O(1); None si no existe."""
+        return self.exactos.get(normalize(nombre))
+
+    def suggest(self, nombre, limit=3):
+        """Lista de (Entrada, puntaje) más parecidas al nombre, de mayor a menor."""
+        clave = normalize(nombre)
+        votos = Counter()
+        for trigrama in _trigramas(clave):
+            votos.update(self.trigramas.get(trigrama, ()))
+        # Un ítem y sus alias cuentan una vez, con el mejor puntaje
+        mejores = {}
+        for p, _ in votos.most_common(MAX_CANDIDATOS):
+            entrada = self.de_clave[p]
+            mejores[entrada] = max(mejores.get(entrada, 0), _puntaje(clave, self.claves[p]))
+        return sorted(mejores.items(), key=lambda par: par[1], reverse=True)[:limit]
+
+    def match(self, nombre, cutoff=CORTE_DIFUSO):
+        """Entrada exacta o, si no hay, la sugerencia difusa por encima del corte.
+
+        Si dos ítems empatan arriba ("de pollo") no se elige ninguno.
+        """
+        exacta = self.lookup(nombre)
+        if exacta is not None:
+            return exacta
+        sugerencias = self.suggest(nombre, limit=2)
+        if not sugerencias or sugerencias[0][1] < cutoff:
+            return None
+        if len(sugerencias) > 1 and sugerencias[1][1] == sugerencias[0][1]:
+            return None
+        return sugerencias[0][0]
+
+@per_version
+def get_index(carta):
+    """Devuelve el CatalogIndex de la carta, construido una sola vez por versión."""
+    return CatalogIndex(carta)
@@ -0,0 +1,369 @@
+import logging
+import random
+import threading
+import time
+
+# Modelo por tarea; cada backend puede cambiarlos al crearse
+MODELOS_OPENAI = {
+    "chat": "gpt-3.5-turbo",
+    "extraccion": "gpt-3.5-turbo",
+    "parseo": "gpt-3.5-turbo",
+    "moderacion": None,
+}
+MODELOS_GROQ = {
+    "chat": "llama3-8b-8192",
+    "extraccion": "llama3-8b-8192",
+    "parseo": "llama3-8b-8192",
+    # Groq no tiene endpoint de moderación: se usa un modelo clasificador por chat
+    "moderacion": "llama-guard-3-8b",
+}
+
+
+class BackendUnavailable(Exception):
+    """El circuito está abierto o se agotaron los reintentos dentro del plazo."""
+
+
+def _reintentable(error):
+    if isinstance(error, (NotImplementedError, TypeError, ValueError)):
+        return False
+    # Sin código HTTP (red, timeout) o errores del servidor / límite de tasa
+    status = getattr(error, "status_code", None)
+    return status is None or status == 429 or status >= 500
+
+
+class CircuitBreaker:
+    """Abre el circuito tras `umbral` fallos seguidos y lo prueba de nuevo tras `enfriamiento` s.
+
+    Pasado el enfriamiento deja pasar una sola llamada de prueba (semiabierto):
+    si funciona el circuito se cierra, si falla se vuelve a abrir.
+    """
+
+    def __init__(self, umbral=5, enfriamiento=30.0):
+        self.umbral = umbral
+        self.enfriamiento = enfriamiento
+        self.fallos = 0
+        self.abierto_hasta = None   # None: circuito cerrado
+        self._probando = False
+        self._lock = threading.Lock()
+
+    def permitir(self):
+        with self._lock:
+            if self.abierto_hasta is None:
+                return True
+            if self._probando or time.monotonic() < self.abierto_hasta:
+                return False
+            self._probando = True
+            return True
+
+    def exito(self):
+        with self._lock:
+            self.fallos = 0
+            self.abierto_hasta = None
+            self._probando = False
+
+    def fallo(self):
+        with self._lock:
+            self.fallos += 1
+            if self._probando or self.fallos >= self.umbral:
+                self.abierto_hasta = time.monotonic() + self.enfriamiento
+                self._probando = False
+                logging.warning(f"Circuito del LLM abierto por {self.enfriamiento}s tras {self.fallos} fallos")
+
+
+class Backend:
+    """Interfaz común para los proveedores de LLM.
+
+    Las subclases implementan `_complete`, `_stream` y `_moderate`; esta clase
+    agrega el plazo por llamada, los reintentos con jitter y el circuit breaker.
+    """
+
+    def __init__(self, modelos, timeout=30.0, reintentos=2, espera_base=0.25, breaker=None):
+        self.modelos = dict(modelos)
+        self.timeout = timeout
+        self.reintentos = reintentos
+        self.espera_base = espera_base
+        self.breaker = breaker or CircuitBreaker()
+        self.stats = {"llamadas": 0, "reintentos": 0, "fallos": 0, "rechazadas": 0}
+        self._stats_lock = threading.Lock()
+
+    def _contar(self, clave):
+        with self._stats_lock:
+            self.stats[clave] += 1
+
+    def model_for(self, task):
+        return self.modelos.get(task) or self.modelos["chat"]
+
+    def warm(self):
+        """Prepara el cliente antes de la primera llamada (p. ej. en segundo plano tras el primer render)."""
+
+    def can_moderate(self):
+        """Indica si `moderate` está implementado para este backend y su configuración."""
+        return type(self)._moderate is not Backend._moderate
+
+    def _llamar(self, fn, timeout):
+        """Ejecuta fn(restante) con reintentos exponenciales con jitter dentro del plazo."""
+        if not self.breaker.permitir():
+            self._contar("rechazadas")
+            raise BackendUnavailable("Circuito abierto")
+        limite = time.monotonic() + (timeout or self.timeout)
+        intento = 0
+        while True:
+            restante = limite - time.monotonic()
+            self._contar("llamadas")
+            try:
+                resultado = fn(max(restante, 0.1))
+                self.breaker.exito()
+                return resultado
+            except Exception as e:
+                self._contar("fallos")
+                # Un error del cliente (p. ej. 400) no indica que el proveedor esté caído
+                if not _reintentable(e):
+                    self.breaker.exito()
+                    raise
+                self.breaker.fallo()
+                espera = random.uniform(0, self.espera_base * 2 ** intento)
+                agotado = intento >= self.reintentos or time.monotonic() + espera >= limite
+                if agotado or not self.breaker.permitir():
+                    raise
+                intento += 1
+                self._contar("reintentos")
+                time.sleep(espera)
+
+    def complete(self, messages, task="chat", timeout=None, uso=None, **kwargs):
+        """Devuelve el texto completo de la respuesta.
+
+        Si se pasa el dict `uso`, se llena con prompt_tokens y completion_tokens.
+        """
+        modelo = self.model_for(task)
+        return self._llamar(lambda restante: self._complete(modelo, messages, restante, uso, **kwargs), timeout)
+
+    def stream(self, messages, task="chat", timeout=None, uso=None, **kwargs):
+        """Generador de fragmentos de texto; solo se reintenta antes del primer fragmento."""
+        modelo = self.model_for(task)
+        fragmentos = self._llamar(lambda restante: self._stream(modelo, messages, restante, uso, **kwargs), timeout)
+        yield from fragmentos
+
+    def moderate(self, texto, timeout=None):
+        """True si el texto se marca como inapropiado."""
+        return self._llamar(lambda restante: self._moderate(texto, restante), timeout)
+
+    def _complete(self, modelo, messages, timeout, uso, **kwargs):
+        raise NotImplementedError
+
+    def _stream(self, modelo, messages, timeout, uso, **kwargs):
+        raise NotImplementedError
+
+    def _moderate(self, texto, timeout):
+        raise NotImplementedError(f"{type(self).__name__} no ofrece moderación")
+
+
+def _copiar_uso(uso, usage):
+    if uso is not None and usage is not None:
+        uso["prompt_tokens"] = usage.prompt_tokens
+        uso["completion_tokens"] = usage.completion_tokens
+
+
+class _ClienteCompatible(Backend):
+    """Backend para SDKs con la API de chat de OpenAI (openai, groq)."""
+
+    # El último fragmento del stream trae `usage` si se pide con stream_options
+    uso_en_stream = False
+
+    def __init__(self, fabrica, modelos, **kwargs):
+        super().__init__(modelos, **kwargs)
+        self._fabrica = fabrica
+        self._client = None
+        self._client_lock = threading.Lock()
+
+    @property
+    def client(self):
+        """Cliente del SDK: se importa y se construye en la primera llamada, no al cargar la app."""
+        if self._client is None:
+            with self._client_lock:
+                if self._client is None:
+                    self._client = self._fabrica()
+        return self._client
+
+    def warm(self):
+        self.client
+
+    def _complete(self, modelo, messages, timeout, uso, **kwargs):
+        completion = self.client.chat.completions.create(
+            model=modelo, messages=messages, stream=False, timeout=timeout, **kwargs
+        )
+        _copiar_uso(uso, completion.usage)
+        return completion.choices[0].message.content
+
+    def _stream(self, modelo, messages, timeout, uso, **kwargs):
+        if uso is not None and self.uso_en_stream:
+            kwargs["stream_options"] = {"include_usage": True}
+        stream = self.client.chat.completions.create(
+            model=modelo, messages=messages, stream=True, timeout=timeout, **kwargs
+        )
+        # La conexión ya está abierta: los errores posteriores no se reintentan
+        return _fragmentos(stream, uso)
+
+
+def _fragmentos(stream, uso=None):
+    try:
+        for chunk in stream:
+            _copiar_uso(uso, getattr(chunk, "usage", None))
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+    finally:
+        stream.close()
+
+
+class OpenAIBackend(_ClienteCompatible):
+    uso_en_stream = True
+
+    def __init__(self, api_key, modelos=None, base_url=None, **kwargs):
+        def fabrica():
+            from openai import OpenAI
+            # Los reintentos los maneja Backend; el cliente mantiene el pool de conexiones HTTP
+            return OpenAI(api_key=api_key, base_url=base_url, max_retries=0)
+        super().__init__(fabrica, modelos or MODELOS_OPENAI, **kwargs)
+
+    def _moderate(self, texto, timeout):
+        opciones = {"model": self.modelos["moderacion"]} if self.modelos.get("moderacion") else {}
+        response = self.client.moderations.create(input=texto, timeout=timeout, **opciones)
+        logging.info(f"Moderation API response: {response}")
+        return response.results[0].flagged
+
+
+class GroqBackend(_ClienteCompatible):
+    def __init__(self, api_key, modelos=None, base_url=None, **kwargs):
+        def fabrica():
+            from groq import Groq
+            return Groq(api_key=api_key, base_url=base_url, max_retries=0)
+        super().__init__(fabrica, modelos or MODELOS_GROQ, **kwargs)
+
+    def can_moderate(self):
+        return bool(self.modelos.get("moderacion"))
+
+    def _moderate(self, texto, timeout):
+        if not self.can_moderate():
+            return super()._moderate(texto, timeout)
+        # Llama Guard responde "safe" o "unsafe" seguido de las categorías
+        completion = self.client.chat.completions.create(
+            model=self.modelos["moderacion"], messages=[{"role": "user", "content": texto}],
+            timeout=timeout, temperature=0, max_tokens=10,
+        )
+        return completion.choices[0].message.content.strip().lower().startswith("unsafe")
+
+
+def _eco(messages):
+    ultimo = next((m["content"] for m in reversed(messages) if m["role"] == "user"), "")
+    return f"Entendido: {ultimo}"
+
+
+class StubBackend(Backend):
+    """Backend local para pruebas sin red: latencia y fallos configurables.
+
+    `responder(messages)` arma la respuesta; por defecto repite el último mensaje
+    del cliente. `prohibidas` son palabras que la moderación marca.
+    """
+
+    def __init__(self, latencia=0.0, primer_token=None, tasa_fallos=0.0, responder=None,
+                 prohibidas=(), modelos=None, semilla=None, **kwargs):
+        super().__init__(modelos or {"chat": "stub"}, **kwargs)
+        self.latencia = latencia
+        self.primer_token = latencia if primer_token is None else primer_token
+        self.tasa_fallos = tasa_fallos
+        self.responder = responder or _eco
+        self.prohibidas = tuple(p.lower() for p in prohibidas)
+        self._random = random.Random(semilla)
+
+    def _quizas_fallar(self):
+        if self._random.random() < self.tasa_fallos:
+            raise ConnectionError("Fallo simulado del backend")
+
+    @staticmethod
+    def _estimar_uso(uso, messages, texto):
+        # Misma estimación que el servidor falso: ~4 caracteres por token
+        if uso is not None:
+            uso["prompt_tokens"] = sum(len(m["content"]) for m in messages) // 4
+            uso["completion_tokens"] = len(texto) // 4
+
+    def _complete(self, modelo, messages, timeout, uso, **kwargs):
+        time.sleep(min(self.latencia, timeout))
+        self._quizas_fallar()
+        texto = self.responder(messages)
+        self._estimar_uso(uso, messages, texto)
+        return texto
+
+    def _stream(self, modelo, messages, timeout, uso, **kwargs):
+        time.sleep(min(self.primer_token, timeout))
+        self._quizas_fallar()
+        texto = self.responder(messages)
+        self._estimar_uso(uso, messages, texto)
+        palabras = texto.split(" ")
+        resto = max(self.latencia - self.primer_token, 0) / max(len(palabras), 1)
+
+        def fragmentos():
+            for n, palabra in enumerate(palabras):
+                if n:
+                    time.sleep(resto)
+                yield palabra if n == 0 else " " + palabra
+        return fragmentos()
+
+    def _moderate(self, texto, timeout):
+        time.sleep(min(self.latencia / 4, timeout))
+        self._quizas_fallar()
+        return any(p in texto.lower() for p in self.prohibidas)
+
+
+_CLASES = {"openai": OpenAIBackend, "groq": GroqBackend, "stub": StubBackend}
+_MODELOS = {"openai": MODELOS_OPENAI, "groq": MODELOS_GROQ, "stub": {"chat": "stub"}}
+_backends = {}
+_backends_lock = threading.Lock()
+
+
+def _clave(valor):
+    """Versión hashable de las opciones de un backend (los dicts como tuplas ordenadas)."""
+    if isinstance(valor, dict):
+        return tuple(sorted((k, _clave(v)) for k, v in valor.items()))
+    return valor
+
+
+def get_backend(nombre="openai", **kwargs):
+    """Backend compartido del proceso ("openai", "groq" o "stub"); se crea en el primer uso.
+
+    Se comparte por nombre y opciones: pedirlo con otra clave, URL o modelos
+    crea otro backend en vez de devolver el primero.
+    """
+    clave = (nombre, _clave(kwargs))
+    with _backends_lock:
+        if clave not in _backends:
+            _backends[clave] = _CLASES[nombre](**kwargs)
+        return _backends[clave]
+
+
+def backend_from_config(config, por_defecto="openai"):
+    """Backend según la configuración (st.secrets u os.environ).
+
+    Claves: LLM_BACKEND, OPENAI_API_KEY / GROQ_API_KEY, OPENAI_BASE_URL / GROQ_BASE_URL,
+    LLM_TIMEOUT, LLM_REINTENTOS
+    y LLM_MODELO_<TAREA> (CHAT, EXTRACCION, PARSEO, MODERACION) para cambiar el modelo de una tarea.
+    """
+    nombre = config.get("LLM_BACKEND", por_defecto)
+    modelos = dict(_MODELOS[nombre])
+    for tarea in ("chat", "extraccion", "parseo", "moderacion"):
+        modelo = config.get(f"LLM_MODELO_{tarea.upper()}")
+        if modelo:
+            modelos[tarea] = modelo
+    opciones = {
+        "modelos": modelos,
+        "timeout": float(config.get("LLM_TIMEOUT", 30)),
+        "reintentos": int(config.get("LLM_REINTENTOS", 2)),
+    }
+    if nombre != "stub":
+        opciones["api_key"] = config[f"{nombre.upper()}_API_KEY"]
+        opciones["base_url"] = config.get(f"{nombre.upper()}_BASE_URL")
+    backend = get_backend(nombre, **opciones)
+    if not backend.can_moderate():
+        logging.warning(f"El backend {nombre} no ofrece moderación: los mensajes no se moderarán")
+    return backend
@@ -0,0 +1,88 @@
+from .catalogo import per_version
+from .prompts import get_system_prompt
+from .render import format_menu_table
+
+BIENVENIDA = "¡Hola! Bienvenido a Sazón Bot. Este es el menú del día:\n\n{menu}\n\n¿Qué te puedo ofrecer?"
+
+
+class Mensaje:
+    """Mensaje de chat compacto; se lee como el dict {"role", "content"} que espera la API."""
+
+    __slots__ = ("role", "content")
+
+    def __init__(self, role, content):
+        self.role = role
+        self.content = content
+
+    def __getitem__(self, clave):
+        if clave == "role":
+            return self.role
+        if clave == "content":
+            return self.content
+        raise KeyError(clave)
+
+    def get(self, clave, default=None):
+        return self[clave] if clave in self.__slots__ else default
+
+    def as_dict(self):
+        return {"role": self.role, "content": self.content}
+
+    def __getstate__(self):
+        return (self.role, self.content)
+
+    def __setstate__(self, estado):
+        self.role, self.content = estado
+
+    def __eq__(self, otro):
+        return isinstance(otro, Mensaje) and (self.role, self.content) == (otro.role, otro.content)
+
+    def __repr__(self):
+        return f"Mensaje({self.role!r}, {self.content[:40]!r})"
+
+
+class Historial:
+    """Historial de una sesión: prefijo compartido e inmutable + turnos propios.
+
+    Se comporta como la lista de mensajes de antes (índices, slices, len,
+    iteración y append de dicts), pero el prompt del sistema y la bienvenida con
+    el menú son una sola tupla por versión de la carta compartida entre sesiones.
+    """
+
+    __slots__ = ("prefijo", "turnos")
+
+    def __init__(self, prefijo):
+        self.prefijo = prefijo
+        self.turnos = []
+
+    def append(self, message):
+        self.turnos.append(message if isinstance(message, Mensaje) else Mensaje(message["role"], message["content"]))
+
+    def __len__(self):
+        return len(self.prefijo) + len(self.turnos)
+
+    def __iter__(self):
+        yield from self.prefijo
+        yield from self.turnos
+
+    def __getitem__(self, indice):
+        if isinstance(indice, slice):
+            return list(self)[indice]
+        if indice < 0:
+            indice += len(self)
+        if indice < len(self.prefijo):
+            return self.prefijo[indice]
+        return self.turnos[indice - len(self.prefijo)]
+
+
+@per_version
+def get_prefix(carta):
+    """Prompt del sistema y bienvenida con el menú; una tupla por versión de la carta."""
+    return (
+        Mensaje("system", get_system_prompt(carta)),
+        Mensaje("assistant", BIENVENIDA.format(menu=format_menu_table(carta.menu))),
+    )
+
+
+def new_history(carta):
+    """Historial vacío de una sesión nueva (reemplaza a deepcopy(initial_state))."""
+    return Historial(get_prefix(carta))
@@ -0,0 +1,304 @@
+import bisect
+import json
+import logging
+import os
+import sys
+import threading
+import time
+import uuid
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+from .cola import WriteBehindQueue
+
+LIMITES_SEGUNDOS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+LIMITES_BYTES = (1024, 2048, 4096, 8192, 16384, 32768, 65536, 131072)
+DIRECTORIO_PERFILES = os.environ.get("SAZON_PERFILES", "perfiles")
+
+
+class Histograma:
+    """Histograma acumulado al estilo Prometheus (buckets `le`, suma y cuenta)."""
+
+    def __init__(self, limites):
+        self.limites = limites
+        self.cuentas = [0] * (len(limites) + 1)
+        self.suma = 0.0
+        self.total = 0
+
+    def observe(self, valor):
+        self.cuentas[bisect.bisect_left(self.limites, valor)] += 1
+        self.suma += valor
+        self.total += 1
+
+    def lineas(self, nombre, etiquetas=""):
+        separador = "," if etiquetas else ""
+        acumulado = 0
+        for limite, cuenta in zip((*self.limites, "+Inf"), self.cuentas):
+            acumulado += cuenta
+            yield f'{nombre}_bucket{{{etiquetas}{separador}le="{limite}"}} {acumulado}'
+        sufijo = f"{{{etiquetas}}}" if etiquetas else ""
+        yield f"{nombre}_sum{sufijo} {self.suma}"
+        yield f"{nombre}_count{sufijo} {self.total}"
+
+
+def _lineas_fuente(prefijo, datos, etiqueta):
+    """Gauges de un dict de métricas; los dicts anidados van como `etiqueta="clave"`."""
+    series = {}
+    for clave, valor in datos.items():
+        pares = valor.items() if isinstance(valor, dict) else [(None, valor)]
+        for metrica, numero in pares:
+            if not isinstance(numero, (int, float)):
+                continue
+            nombre = f"{prefijo}_{clave if metrica is None else metrica}"
+            etiquetas = "" if metrica is None else f'{{{etiqueta}="{clave}"}}'
+            series.setdefault(nombre, []).append(f"{nombre}{etiquetas} {numero}")
+    for nombre, lineas in sorted(series.items()):
+        yield f"# TYPE {nombre} gauge"
+        yield from lineas
+
+
+class Registro:
+    """Agregados del proceso: duración por etapa, tokens y tamaño del payload.
+
+    Otros módulos suman sus contadores con `register`; se leen al exportar.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.etapas = {}
+        self.payload = Histograma(LIMITES_BYTES)
+        self.tokens = Counter()
+        self.turnos = 0
+        self.fuentes = {}
+
+    def register(self, nombre, fuente, etiqueta="tipo"):
+        """Exporta `fuente()` (dict de números, o de dicts por `etiqueta`) como sazon_<nombre>_*."""
+        with self._lock:
+            self.fuentes[nombre] = (fuente, etiqueta)
+
+    def observe_span(self, etapa, segundos):
+        with self._lock:
+            if etapa not in self.etapas:
+                self.etapas[etapa] = Histograma(LIMITES_SEGUNDOS)
+            self.etapas[etapa].observe(segundos)
+
+    def observe_payload(self, tamano):
+        with self._lock:
+            self.payload.observe(tamano)
+
+    def add_turn(self):
+        with self._lock:
+            self.turnos += 1
+
+    def add_tokens(self, uso):
+        with self._lock:
+            self.tokens.update({k: v for k, v in uso.items() if isinstance(v, int)})
+
+    def to_prometheus(self):
+        """Texto en el formato de exposición de Prometheus."""
+        with self._lock:
+            lineas = [
+                "# TYPE sazon_etapa_segundos histogram",
+                *(linea for etapa, h in sorted(self.etapas.items())
+                  for linea in h.lineas("sazon_etapa_segundos", f'etapa="{etapa}"')),
+                "# TYPE sazon_payload_bytes histogram",
+                *self.payload.lineas("sazon_payload_bytes"),
+                "# TYPE sazon_tokens_total counter",
+                *(f'sazon_tokens_total{{tipo="{tipo}"}} {n}' for tipo, n in sorted(self.tokens.items())),
+                "# TYPE sazon_turnos_total counter",
+                f"sazon_turnos_total {self.turnos}",
+            ]
+            fuentes = sorted(self.fuentes.items())
+        # Fuera del lock: cada fuente usa el suyo
+        for nombre, (fuente, etiqueta) in fuentes:
+            lineas.extend(_lineas_fuente(f"sazon_{nombre}", fuente(), etiqueta))
+        return "\n".join(lineas) + "\n"
+
+
+registro = Registro()
+_exportador = None
+_servidor = None
+_config_lock = threading.Lock()
+
+
+def _escribir_lineas(ruta):
+    def sink(lote):
+        with open(ruta, "a", encoding="utf-8") as f:
+            f.writelines(json.dumps(r, ensure_ascii=False, separators=(",", ":")) + "\n" for r in lote)
+    return sink
+
+
+def configure(jsonl=None, puerto=None, host="127.0.0.1"):
+    """Activa la exportación: registros JSON lines en `jsonl` y/o /metrics en `host:puerto`.
+
+    Por defecto /metrics solo escucha en la máquina local; para que lo lea un
+    Prometheus remoto se pasa host="0.0.0.0" (o la interfaz que corresponda).
+    """
+    global _exportador, _servidor
+    with _config_lock:
+        if jsonl and _exportador is None:
+            _exportador = WriteBehindQueue(_escribir_lineas(jsonl), nombre="metricas")
+        if puerto and _servidor is None:
+            _servidor = serve_prometheus(int(puerto), host)
+
+
+def serve_prometheus(puerto, host="127.0.0.1"):
+    """Sirve registro.to_prometheus() en http://host:puerto/metrics desde un hilo."""
+    from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            datos = registro.to_prometheus().encode()
+            self.send_response(200 if self.path == "/metrics" else 404)
+            self.send_header("Content-Type", "text/plain; version=0.0.4")
+            self.send_header("Content-Length", str(len(datos)))
+            self.end_headers()
+            self.wfile.write(datos)
+
+        def log_message(self, *args):
+            pass
+
+    servidor = ThreadingHTTPServer((host, puerto), Handler)
+    servidor.daemon_threads = True
+    threading.Thread(target=servidor.serve_forever, name="sazon-metricas", daemon=True).start()
+    logging.info(f"Métricas en http://{host}:{puerto}/metrics")
+    return servidor
+
+
+def _exportar(registro_json):
+    if _exportador is not None:
+        _exportador.put(registro_json)
+
+
+class Muestreador:
+    """Perfilador por muestreo de un hilo: cuenta pilas en formato folded (flamegraph)."""
+
+    def __init__(self, hilo_id, intervalo=0.005):
+        self.hilo_id = hilo_id
+        self.intervalo = intervalo
+        self.pilas = Counter()
+        self._parar = threading.Event()
+        self._hilo = threading.Thread(target=self._muestrear, name="sazon-perfil", daemon=True)
+
+    def start(self):
+        self._hilo.start()
+        return self
+
+    def _muestrear(self):
+        while not self._parar.wait(self.intervalo):
+            frame = sys._current_frames().get(self.hilo_id)
+            pila = []
+            while frame is not None:
+                pila.append(f"{os.path.basename(frame.f_code.co_filename)}:{frame.f_code.co_name}")
+                frame = frame.f_back
+            if pila:
+                self.pilas[";".join(reversed(pila))] += 1
+
+    def stop(self):
+        self._parar.set()
+        self._hilo.join()
+        return self.pilas
+
+
+class Traza:
+    """Spans de un turno (una ejecución del script) con IDs de sesión y de petición.
+
+    Cada span se suma al registro del proceso y, si hay exportador, sale como
+    una línea JSON. Con perfilar=True el hilo del turno se muestrea y las pilas
+    se agregan a perfiles/<sesion>.folded al terminar.
+
+    El trabajo del turno que sigue en segundo plano (extraer el pedido) se
+    envuelve con `attach`: el resumen del turno sale cuando termina, con sus
+    spans y tokens incluidos.
+    """
+
+    def __init__(self, sesion, perfilar=False):
+        self.sesion = sesion
+        self.peticion = uuid.uuid4().hex[:12]
+        self.inicio = time.perf_counter()
+        self.etapas = {}
+        self.uso = Counter()
+        self.payload = 0
+        self._lock = threading.Lock()
+        self._pendientes = 0
+        self._total = None
+        self._muestreador = Muestreador(threading.get_ident()).start() if perfilar else None
+
+    def record(self, etapa, segundos, **atributos):
+        registro.observe_span(etapa, segundos)
+        with self._lock:
+            self.etapas[etapa] = self.etapas.get(etapa, 0.0) + segundos
+        _exportar({
+            "ts": datetime.now().isoformat(timespec="milliseconds"), "sesion": self.sesion,
+            "peticion": self.peticion, "etapa": etapa, "ms": round(segundos * 1000, 3), **atributos,
+        })
+
+    @contextmanager
+    def span(self, etapa, **atributos):
+        """Mide el bloque; se pueden agregar atributos al dict que devuelve."""
+        inicio = time.perf_counter()
+        try:
+            yield atributos
+        finally:
+            self.record(etapa, time.perf_counter() - inicio, **atributos)
+
+    def add_usage(self, uso):
+        """Tokens reportados por la API (campo usage)."""
+        registro.add_tokens(uso)
+        with self._lock:
+            self.uso.update(uso)
+
+    def observe_payload(self, messages):
+        """Tamaño en bytes de los mensajes enviados al modelo."""
+        tamano = len(json.dumps(messages, ensure_ascii=False).encode())
+        registro.observe_payload(tamano)
+        with self._lock:
+            self.payload += tamano
+        return tamano
+
+    def attach(self, fn):
+        """Envuelve fn para correrla en segundo plano como parte del turno.
+
+        Se llama antes de finish(); el resumen del turno espera a que fn termine.
+        """
+        with self._lock:
+            self._pendientes += 1
+
+        def envuelta(*args, **kwargs):
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                with self._lock:
+                    self._pendientes -= 1
+                    cerrar = self._pendientes == 0 and self._total is not None
+                if cerrar:
+                    self._exportar_turno()
+        return envuelta
+
+    def finish(self):
+        """Cierra el turno; devuelve su duración sin contar el trabajo en segundo plano."""
+        total = time.perf_counter() - self.inicio
+        registro.add_turn()
+        if self._muestreador is not None:
+            self._guardar_perfil(self._muestreador.stop())
+        with self._lock:
+            self._total = total
+            cerrar = self._pendientes == 0
+        if cerrar:
+            self._exportar_turno()
+        return total
+
+    def _exportar_turno(self):
+        with self._lock:
+            _exportar({
+                "ts": datetime.now().isoformat(timespec="milliseconds"), "sesion": self.sesion,
+                "peticion": self.peticion, "etapa": "turno", "ms": round(self._total * 1000, 3),
+                "etapas_ms": {k: round(v * 1000, 3) for k, v in self.etapas.items()},
+                "tokens": dict(self.uso), "payload_bytes": self.payload,
+            })
+
+    def _guardar_perfil(self, pilas):
+        os.makedirs(DIRECTORIO_PERFILES, exist_ok=True)
+        with open(os.path.join(DIRECTORIO_PERFILES, f"{self.sesion}.folded"), "a", encoding="utf-8") as f:
+            f.writelines(f"{pila} {n}\n" for pila, n in pilas.most_common())
@@ -0,0 +1,82 @@
+import re
+import threading
+
+from .cache import TTLCache
+from .catalogo import per_version
+from .cantidades import PALABRAS_NUMERO
+from .indice import normalize
+from .metricas import registro
+from .pedido import PAGOS
+
+# Mensajes más largos que esto siempre pasan por la moderación remota
+MAX_PALABRAS_LOCALES = 6
+_PALABRAS_SEGURAS = {
+    "si", "no", "ok", "okay", "vale", "claro", "dale", "listo", "bueno", "perfecto", "correcto",
+    "gracias", "hola", "buenas", "tardes", "dias", "noches", "por", "favor", "y", "con", "de",
+    "del", "la", "el", "los", "las", "en", "a", "para", "un", "una", "mas", "nada", "eso", "es",
+    "todo", "seria", "recojo", "recoger", "local", "delivery", "domicilio", "pago",
+    "efectivo", "tarjeta", "credito", "debito", "bebida", "bebidas", "postre", "postres",
+}
+_PALABRA = re.compile(r"\w+")
+
+_veredictos = TTLCache(max_size=2048, ttl=3600.0)
+stats = {"locales": 0, "cache": 0, "remotas": 0}
+_stats_lock = threading.Lock()
+
+
+@per_version
+def _vocabulario(carta):
+    """Palabras de la carta, distritos, pagos y números; una vez por versión."""
+    vocabulario = set(_PALABRAS_SEGURAS) | set(PALABRAS_NUMERO) | set(PAGOS)
+    for columna in (
+        carta.menu["Plato"], carta.bebidas["descripcion"], carta.bebidas["bebida"],
+        carta.postres["Postres"], carta.distritos["Distrito"],
+    ):
+        for nombre in columna.tolist():
+            vocabulario.update(_PALABRA.findall(normalize(nombre)))
+    return vocabulario
+
+
+def is_trivially_safe(texto, carta):
+    """Mensajes cortos hechos solo de palabras de la carta, números, sí/no, pagos o distritos."""
+    palabras = _PALABRA.findall(normalize(texto))
+    if not palabras or len(palabras) > MAX_PALABRAS_LOCALES:
+        return False
+    vocabulario = _vocabulario(carta)
+    return all(p.isdigit() or p in vocabulario for p in palabras)
+
+
+def _contar(clave):
+    with _stats_lock:
+        stats[clave] += 1
+
+
+def moderate(texto, carta, remote):
+    """Devuelve True si el texto es inapropiado, evitando la llamada remota cuando se puede.
+
+    `remote(texto)` debe devolver True/False, o None si falló (no se guarda en caché).
+    """
+    if is_trivially_safe(texto, carta):
+        _contar("locales")
+        return False
+    clave = normalize(texto)
+    veredicto = _veredictos.get(clave)
+    if veredicto is not None:
+        _contar("cache")
+        return veredicto
+    _contar("remotas")
+    veredicto = remote(texto)
+    if veredicto is None:
+        return False
+    _veredictos.put(clave, veredicto)
+    return veredicto
+
+
+def moderation_stats():
+    """Cuántas llamadas remotas se evitaron por el filtro local y por el caché."""
+    with _stats_lock:
+        actuales = dict(stats)
+    return {**actuales, "evitadas": actuales["locales"] + actuales["cache"], "cache_hit_rate": _veredictos.hit_rate}
+
+
+registro.register("moderacion", moderation_stats)
@@ -0,0 +1,171 @@
+import re
+from dataclasses import dataclass, field
+
+from .cantidades import parse_quantities
+from .catalogo import per_version
+from .extraccion import parse_confirmed_order, parse_order_table
+from .indice import get_index, normalize
+from .render import display_confirmed_order
+
+PAGOS = ("tarjeta", "efectivo", "yape", "plin")
+_RECOJO = re.compile(r"\b(recoger|recojo|en el local)\b", re.IGNORECASE)
+_DELIVERY = re.compile(r"\b(delivery|domicilio|entrega|env[ií]o|enviar)\b", re.IGNORECASE)
+# Preguntas sobre el servicio: no eligen entrega, distrito ni pago
+_PREGUNTA = re.compile(r"[¿?]|^\s*(reparten|repartes|llegan|hacen|hay|aceptan|puedo|se puede)\b", re.IGNORECASE)
+
+
+@dataclass
+class Item:
+    nombre: str
+    cantidad: int
+    precio_unitario: float
+
+    @property
+    def subtotal(self):
+        return self.cantidad * self.precio_unitario
+
+
+@dataclass
+class Pedido:
+    """Estado del pedido de una sesión; los precios siempre salen de la carta."""
+    items: dict = field(default_factory=dict)
+    entrega: str = None       # "delivery" o "recojo"
+    distrito: str = None
+    metodo_pago: str = None
+    confirmado_en: str = None
+
+    def set_item(self, nombre, cantidad, precio_unitario):
+        """Fija la cantidad de un ítem; con cantidad 0 lo quita."""
+        if cantidad <= 0:
+            self.items.pop(nombre, None)
+        else:
+            self.items[nombre] = Item(nombre, cantidad, precio_unitario)
+
+    def add_item(self, nombre, cantidad, precio_unitario):
+        actual = self.items.get(nombre)
+        self.set_item(nombre, cantidad + (actual.cantidad if actual else 0), precio_unitario)
+
+    def cantidades(self):
+        """Diccionario {nombre: cantidad} del pedido."""
+        return {nombre: item.cantidad for nombre, item in self.items.items()}
+
+    @property
+    def total(self):
+        return sum(item.subtotal for item in self.items.values())
+
+    @property
+    def confirmado(self):
+        return self.confirmado_en is not None
+
+    def __bool__(self):
+        return bool(self.items)
+
+    def to_json(self):
+        """Mismo formato que el JSON de extract_order_json."""
+        return {
+            "Platos": [
+                {"Plato": i.nombre, "Cantidad": i.cantidad, "Precio Total": i.subtotal}
+                for i in self.items.values()
+            ],
+            "Total": self.total,
+            "Metodo de Pago": self.metodo_pago,
+            "Lugar de Entrega": self.distrito if self.entrega != "recojo" else "Recojo en el local",
+            "Timestamp Confirmacion": self.confirmado_en,
+        }
+
+    def to_prompt(self):
+        """Bloque con el pedido para el prompt del modelo; la tabla ya viene calculada."""
+        if not self.items:
+            lineas = ["Pedido actual: vacío."]
+        else:
+            lineas = [
+                "Pedido actual (calculado por el sistema). Copia esta tabla tal cual cuando resumas o "
+                "confirmes el pedido; no recalcules cantidades ni montos:",
+                display_confirmed_order(self.to_json()["Platos"]).rstrip("\n"),
+            ]
+        if self.entrega:
+            lineas.append(f"Entrega: {self.entrega}" + (f" en {self.distrito}" if self.distrito else ""))
+        if self.metodo_pago:
+            lineas.append(f"Método de pago: {self.metodo_pago}")
+        return "\n".join(lineas)
+
+
+def order_from_text(texto, carta):
+    """Pedido con los platos y cantidades de un texto como "2 arroz con pollo y 1 chicha".
+
+    Devuelve (pedido, errores); el pedido es None si no se reconoce ningún plato
+    o hay errores (cantidad fuera de rango, plato que no está en la carta).
+    """
+    pares, errores = parse_quantities(texto, get_index(carta))
+    if errores or not pares:
+        return None, errores
+    pedido = Pedido()
+    for cantidad, entrada in pares:
+        pedido.add_item(entrada.nombre, cantidad, entrada.precio)
+    return pedido, errores
+
+
+@per_version
+def _distritos(carta):
+    return {normalize(d): d for d in carta.distritos["Distrito"].tolist()}
+
+
+def find_district(texto, carta):
+    """Nombre del distrito de reparto escrito por el cliente (sin importar tildes ni mayúsculas), o None."""
+    return _distritos(carta).get(normalize(texto))
+
+
+def update_from_user(pedido, texto, carta, pares=None):
+    """Actualiza platos, entrega, distrito y método de pago con lo que escribió el cliente.
+
+    `pares` son los (cantidad, Entrada) ya interpretados del mensaje; si es None
+    se interpretan aquí. Cada plato nombrado queda con la cantidad indicada. Las
+    preguntas ("¿reparten a Barranco?", "¿aceptan Yape?") no llenan entrega,
+    distrito ni pago.
+    """
+    if pares is None:
+        pares, _ = parse_quantities(texto, get_index(carta))
+    for cantidad, entrada in pares:
+        pedido.set_item(entrada.nombre, cantidad, entrada.precio)
+    if _PREGUNTA.search(texto):
+        return pedido
+    minusculas = texto.lower()
+    for distrito in carta.distritos["Distrito"].tolist():
+        if distrito.lower() in minusculas:
+            pedido.distrito = distrito
+            pedido.entrega = "delivery"
+    if _RECOJO.search(texto):
+        pedido.entrega = "recojo"
+        pedido.distrito = None
+    elif pedido.entrega is None and _DELIVERY.search(texto):
+        pedido.entrega = "delivery"
+    for pago in PAGOS:
+        if pago in minusculas:
+            pedido.metodo_pago = pago.capitalize()
+    return pedido
+
+
+def update_from_reply(pedido, respuesta, carta, reconciliar=True):
+    """Registra la confirmación de la respuesta y, si `reconciliar`, toma sus cantidades.
+
+    Los platos los fija update_from_user; la tabla del modelo solo se usa para
+    reconciliar los turnos cuyo mensaje no se pudo interpretar localmente
+    ("quita la chicha"), siempre con precios de la carta.
+    """
+    filas = parse_order_table(respuesta) if reconciliar else None
+    if filas:
+        indice = get_index(carta)
+        items = {}
+        for fila in filas:
+            entrada = indice.match(fila["Plato"])
+            if entrada is not None:
+                items[entrada.nombre] = Item(entrada.nombre, fila["Cantidad"], entrada.precio)
+        if items:
+            pedido.items = items
+    confirmado = parse_confirmed_order(respuesta)
+    if confirmado:
+        pedido.metodo_pago = confirmado["Metodo de Pago"]
+        pedido.confirmado_en = confirmado["Timestamp Confirmacion"]
+        if pedido.entrega != "recojo":
+            pedido.distrito = confirmado["Lugar de Entrega"]
+    return pedido
@@ -0,0 +1,117 @@
+from datetime import datetime
+from zoneinfo import ZoneInfo
+
+from .catalogo import per_version
+from .render import (
+    display_bebida,
+    display_confirmed_order,
+    display_distritos,
+    display_menu,
+    display_postre,
+)
+
+# Zona horaria de Lima (stdlib; no hace falta cargar pytz)
+LIMA = ZoneInfo("America/Lima")
+
+def compile_system_prompt(carta):
+    """Define el prompt del sistema para el bot de Sazón incluyendo el menú y distritos.
+
+    Solo depende de la Carta, así que el texto es idéntico en todos los turnos;
+    la hora de Lima va aparte en get_time_message().
+    """
+    menu, distritos, bebidas, postres = carta.menu, carta.distritos, carta.bebidas, carta.postres
+    system_prompt = f"""
+    Eres el bot de pedidos de Sazón, amable y servicial. Ayudas a los clientes a hacer sus pedidos y siempre confirmas que solo pidan platos que están en el menú oficial. Aquí tienes el menú para mostrárselo a los clientes:\n{display_menu(menu)}\n
+    También repartimos en los siguientes distritos: {display_distritos(distritos)}.\n
+    Primero, saluda al cliente y ofrécele el menú. Asegúrate de que el cliente solo seleccione platos que están en el menú actual y explícales que no podemos preparar platos fuera del menú.
+    **IMPORTANTE: Validación de cantidad solicitada**
+    - El cliente puede indicar la cantidad en texto (por ejemplo, "dos") o en números (por ejemplo, "2").
+    - Interpreta y extrae las cantidades independientemente de si están en números o en palabras y asócialas correspondientemente.
+    - Por ejemplo, si el cliente escribe "quiero dos arroz con pollo y diez pachamanca de pollo", interpreta esto como "2 unidades de arroz con pollo" y "10 unidades de pachamanca de pollo".
+    - Si la cantidad solicitada está en el rango de 1 a 100 (inclusive), acepta el pedido sin mostrar advertencias.
+    - Si la cantidad solicitada es mayor que 100, muestra el siguiente mensaje:
+      "Lamento informarte que el límite máximo de cantidad por producto es de 100 unidades. Por favor, reduce la cantidad para procesar tu pedido."
+      
+    Después de que el cliente haya seleccionado sus platos, pregunta si desea recoger su pedido en el local o si prefiere entrega a domicilio. Asegurate que ingrese metodo de entrega.
+     - Si elige entrega, pregúntale al cliente a qué distrito desea que se le envíe su pedido, confirma que el distrito esté dentro de las zonas de reparto y verifica el distrito de entrega con el cliente.
+     - Si el pedido es para recoger, invítalo a acercarse a nuestro local ubicado en UPCH123.
+    
+    Usa solo español peruano en tus respuestas, evitando palabras como "preferís" y empleando "prefiere" en su lugar.
+    
+    Antes de continuar, confirma que el cliente haya ingresado un método de entrega válido. Luego, resume el pedido con la tabla del bloque "Pedido actual" que calcula el sistema, con este formato:\n
+    | **Plato**      | **Cantidad** | **Precio Total** |\n
+    |----------------|--------------|------------------|\n
+    |                |              |                  |\n
+    | **Total**      |              | **S/ 0.00**      |\n
+    
+    Aclara que el monto total del pedido no acepta descuentos ni ajustes de precio.
+    
+    Después, pregunta al cliente si quiere añadir una bebida o postre.
+	- Si responde bebida, muéstrale únicamente la carta de bebidas:{display_bebida(bebidas)}
+	- Si responde postre, muéstrale solo la carta de postres:{display_postre(postres)}
+    *Después de que el cliente agrega bebidas o postres, pregúntale si desea agregar algo más.* Si el cliente desea agregar más platos, bebidas o postres, permite que lo haga. Si no desea agregar más, continúa con el proceso.
+
+    Si el cliente agrega más ítems, muestra la tabla del bloque "Pedido actual" más reciente; el sistema ya recalculó cantidades y montos, no los calcules tú.
+
+    Antes de terminar, pregúntale al cliente: "¿Estás de acuerdo con el pedido?" y espera su confirmación.
+
+    **Luego de confirmar el pedido, pregunta explícitamente al cliente por el método de pago.** Solicita el método de pago preferido (tarjeta, efectivo, Yape u otra opción disponible) y **verifica que el cliente haya ingresado una opción válida antes de continuar**.
+   
+    Luego de verificar el método de pago, confirma el pedido al cliente incluyendo todos los detalles. Incluye explícitamente:
+    	El pedido confirmado será:\n
+    	{display_confirmed_order([{'Plato': '', 'Cantidad': 0, 'Precio Total': 0}])}\n
+	- *Método de pago*: el método que el cliente eligió.
+	- *Lugar de entrega*: el distrito de entrega o indica que recogerá en el local.
+	- *Timestamp Confirmacion*: hora exacta de confirmación del pedido, el valor de la última 'Hora actual en Lima' que recibiste.
+         
+    Recuerda siempre confirmar que el pedido, el metodo de pago y el lugar de entrega estén hayan sido ingresados, completos y correctos antes de registrarlo.
+    """
+    return system_prompt.replace("\n", " ")
+
+
+@per_version
+def get_system_prompt(carta):
+    """Devuelve el prompt del sistema compilado una sola vez por versión de la carta."""
+    return compile_system_prompt(carta)
+
+
+def get_time_message():
+    """Mensaje de sistema con la hora actual de Lima; es la única parte que cambia por turno."""
+    hora_lima = datetime.now(LIMA).strftime("%Y-%m-%d %H:%M:%S")  # Obtiene la hora actual en Lima
+    return {"role": "system", "content": f"Hora actual en Lima: {hora_lima}"}
+
+
+def format_sold_out(agotados, por_agotarse=None):
+    """Aviso de platos agotados y de los que se agotarán pronto para el modelo."""
+    partes = []
+    if agotados:
+        partes.append(
+            "Platos agotados en este momento: " + ", ".join(sorted(agotados)) + ". "
+            "No los ofrezcas ni los agregues al pedido; si el cliente los pide, sugiere otro de la carta."
+        )
+    if por_agotarse:
+        quedan = ", ".join(f"{nombre} (quedan {unidades})" for nombre, unidades in sorted(por_agotarse.items()))
+        partes.append(
+            f"Se agotarán pronto: {quedan}. Si el cliente los pide, avísale que quedan pocas unidades "
+            "y no aceptes más de las que quedan."
+        )
+    return " ".join(partes)
+
+
+def build_messages(carta, messages, pedido=None, agotados=(), por_agotarse=None):
+    """Arma los mensajes a enviar: prompt vigente primero, historial y al final el pedido y la hora.
+
+    El prefijo (prompt del sistema + historial anterior) se mantiene igual entre turnos
+    para que el proveedor pueda reutilizar su caché de prefijos. Por eso los platos
+    agotados (y los que se agotarán pronto) van en un mensaje al final y no
+    recompilan el prompt de la carta.
+    """
+    system = {"role": "system", "content": get_system_prompt(carta)}
+    if messages and messages[0]["role"] == "system":
+        messages = messages[1:]
+    estado = [{"role": "system", "content": pedido.to_prompt()}] if pedido is not None else []
+    if agotados or por_agotarse:
+        estado.append({"role": "system", "content": format_sold_out(agotados, por_agotarse)})
+    # Copias como dict: el historial de la sesión puede guardar registros Mensaje
+    historial = [{"role": m["role"], "content": m["content"]} for m in messages]
+    return [system, *historial, *estado, get_time_message()]
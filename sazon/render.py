@@ -0,0 +1,130 @@
+import functools
+import threading
+import weakref
+
+import numpy as np
+
+# Textos ya generados por (formateador, id del DataFrame). Las tablas de la Carta
+# no se modifican, así que el texto vale mientras viva el mismo DataFrame.
+_cache = {}
+_cache_lock = threading.Lock()
+
+
+def _memo(fn):
+    """Memoriza el texto generado para cada DataFrame mientras este exista."""
+    @functools.wraps(fn)
+    def wrapper(df):
+        clave = (fn.__name__, id(df))
+        hit = _cache.get(clave)
+        if hit is not None and hit[0]() is df:
+            return hit[1]
+        texto = fn(df)
+        ref = weakref.ref(df, lambda _, c=clave: _cache.pop(c, None))
+        with _cache_lock:
+            _cache[clave] = (ref, texto)
+        return texto
+    return wrapper
+
+
+def _texto(col):
+    return col.astype(str)
+
+
+def _soles(col):
+    """Precios con dos decimales, formateados en bloque."""
+    return np.char.mod("%.2f", col.to_numpy(dtype=float)).astype(object)
+
+
+def _lineas(encabezado, filas):
+    return encabezado + "".join(line + "\n" for line in filas)
+
+
+@_memo
+def format_menu_table(menu):
+    """Tabla Markdown del menú con Plato, Descripción y Precio."""
+    if menu.empty:
+        return "No hay platos disponibles."
+    encabezado = (
+        "| **Plato** | **Descripción** | **Precio** |\n"
+        "|-----------|-----------------|-------------|\n"
+    )
+    filas = "| " + _texto(menu["Plato"]) + " | " + _texto(menu["Descripción"]) + " | S/" + _soles(menu["Precio"]) + " |"
+    return _lineas(encabezado, filas)
+
+
+@_memo
+def format_menu(menu):
+    """Menú en bloques: nombre en negrita, descripción y precio."""
+    if menu.empty:
+        return "No hay platos disponibles."
+    bloques = "**" + _texto(menu["Plato"]) + "**\n" + _texto(menu["Descripción"]) + "\n**Precio:** S/" + _texto(menu["Precio"])
+    return "\n\n".join(bloques)
+
+
+@_memo
+def display_menu(menu):
+    """Mostrar el menú con descripciones."""
+    filas = _texto(menu["Plato"]) + ": " + _texto(menu["Descripción"]) + " - " + _texto(menu["Precio"]) + " soles"
+    return _lineas("Aquí está nuestra carta:\n", filas)
+
+
+@_memo
+def display_distritos(distritos):
+    """Mostrar los distritos de reparto disponibles."""
+    filas = "*" + _texto(distritos["Distrito"]) + "*"
+    return _lineas("Los distritos de reparto son:\n", filas)
+
+
+@_memo
+def display_postre(postre):
+    """Mostrar la lista de postres con descripciones."""
+    filas = _texto(postre["Postres"]) + ": " + _texto(postre["Descripción"]) + " - " + _texto(postre["Precio"]) + " soles"
+    return _lineas("Aquí está lista de postres:\n", filas)
+
+
+@_memo
+def display_bebida(bebida):
+    """Mostrar la lista de bebidas con descripciones."""
+    filas = _texto(bebida["bebida"]) + ": " + _texto(bebida["descripcion"]) + " - " + _texto(bebida["precio"]) + " soles"
+    return _lineas("Aquí está lista de bebidas:\n", filas)
+
+
+def display_confirmed_order(order_details):
+    """Genera una tabla en formato Markdown para el pedido confirmado."""
+    filas = [
+        f"| {item['Plato']} | {item['Cantidad']} | S/{item['Precio Total']:.2f} |\n"
+        for item in order_details
+    ]
+    total = sum(item['Precio Total'] for item in order_details)
+    return "".join([
+        "| **Plato** | **Cantidad** | **Precio Total** |\n",
+        "|-----------|--------------|------------------|\n",
+        *filas,
+        "| **Total** |              | **S/ {:.2f}**      |\n".format(total),
+    ])
+
+
+def format_order_table(order_details):
+    """Tabla Markdown con Cantidad y Plato para un pedido {plato: cantidad}."""
+    filas = [
+        f"| {quantity}        | {dish}  |\n"
+        for dish, quantity in order_details.items()
+        if dish and quantity
+    ]
+    return "".join(["| Cantidad | Plato |\n", "|----------|-------|\n", *filas])
+
+
+@_memo
+def format_bebidas_table(bebidas):
+    """Tabla Markdown de bebidas con su precio."""
+    encabezado = "| **Bebida** | **Precio** |\n|------------|------------|\n"
+    filas = "| " + _texto(bebidas["descripcion"]) + " | S/" + _soles(bebidas["precio"]) + " |"
+    return _lineas(encabezado, filas)
+
+
+@_memo
+def format_postres_table(postres):
+    """Tabla Markdown de postres con descripción y precio."""
+    encabezado = "| **Postre** | **Descripción** | **Precio** |\n|------------|-----------------|------------|\n"
+    filas = "| " + _texto(postres["Postres"]) + " | " + _texto(postres["Descripción"]) + " | S/" + _soles(postres["Precio"]) + " |"
+    return _lineas(encabezado, filas)
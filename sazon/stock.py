@@ -0,0 +1,206 @@
+import hashlib
+import io
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from .almacen import get_store
+from .catalogo import SUCURSAL_PRINCIPAL, get_registry
+from .indice import get_index
+
+# Unidades disponibles por plato (columnas Plato,Stock) en el directorio de cada sucursal;
+# los ítems que no aparecen no se controlan. Editar el archivo repone las unidades
+ARCHIVO_STOCK = "stock.csv"
+# Minutos de ventas recientes que se usan para estimar el ritmo, y su media vida
+VENTANA_MINUTOS = 30
+MEDIA_VIDA_MINUTOS = 10
+# Se avisa que un ítem "se agotará pronto" si al ritmo actual dura menos que esto
+AVISO_MINUTOS = 30
+# Segundos entre lecturas de las ventas de otros procesos en el registro compartido
+INTERVALO_SYNC = 2.0
+MENSAJE_AGOTADO = "Lo siento, {platos} ya se agotó por hoy. ¿Te gustaría pedir otra cosa de la carta?"
+
+
+class Stock:
+    """Unidades restantes por ítem y ventas por minuto de la última media hora.
+
+    Las consultas del camino caliente (`is_available`, `agotados`) leen un
+    frozenset que solo se reemplaza cuando un ítem se agota o se repone, así que
+    no toman el lock. Las ventas recientes se guardan en una matriz ítems x
+    minutos (buffer circular) para estimar con una sola operación el ritmo de
+    venta y la hora de agotamiento de todos los ítems.
+
+    Con `store` las unidades viven en el registro SQLite compartido (OrderStore):
+    las ventas se descuentan ahí y `sync()` trae las de otros procesos, así que
+    varios workers no venden dos veces la misma unidad y un reinicio no las olvida.
+    """
+
+    def __init__(self, inicial, ventana=VENTANA_MINUTOS, media_vida=MEDIA_VIDA_MINUTOS, reloj=time.time,
+                 store=None, sucursal=SUCURSAL_PRINCIPAL):
+        self.nombres = list(inicial)
+        self._posiciones = {nombre: i for i, nombre in enumerate(self.nombres)}
+        self.restante = np.array([int(inicial[n]) for n in self.nombres], dtype=np.int64)
+        self.ventana = ventana
+        self.media_vida = media_vida
+        self.reloj = reloj
+        self._ventas = np.zeros((len(self.nombres), ventana), dtype=np.int64)
+        self._minuto = int(reloj() // 60)
+        self._lock = threading.Lock()
+        self.store = store
+        self.sucursal = sucursal
+        self._ultimo_sync = reloj()
+        self.version = 0
+        self.agotados = frozenset()
+        self._publicar()
+
+    def _publicar(self):
+        self.agotados = frozenset(np.asarray(self.nombres, dtype=object)[self.restante <= 0].tolist())
+        self.version += 1
+
+    def _avanzar(self, minuto):
+        """Limpia las columnas de los minutos que salieron de la ventana."""
+        for m in range(max(self._minuto + 1, minuto - self.ventana + 1), minuto + 1):
+            self._ventas[:, m % self.ventana] = 0
+        self._minuto = max(self._minuto, minuto)
+
+    def is_available(self, nombre):
+        """O(1): el nombre de la carta no está agotado (los ítems sin control siempre lo están)."""
+        return nombre not in self.agotados
+
+    def _aplicar(self, restantes):
+        """Fija los restantes {nombre: unidades}; lo que bajó cuenta como venta de este minuto."""
+        minuto = int(self.reloj() // 60)
+        self._avanzar(minuto)
+        antes = self.agotados
+        for nombre, restante in restantes.items():
+            posicion = self._posiciones.get(nombre)
+            if posicion is None:
+                continue
+            vendido = self.restante[posicion] - restante
+            if vendido > 0:
+                self._ventas[posicion, minuto % self.ventana] += vendido
+            self.restante[posicion] = restante
+        if (self.restante <= 0).sum() != len(antes):
+            self._publicar()
+        return sorted(self.agotados - antes)
+
+    def confirm(self, order_json, carta):
+        """Descuenta los platos de un pedido confirmado; devuelve los que se agotaron con él."""
+        indice = get_index(carta)
+        cantidades = {}
+        for item in order_json.get("Platos", []):
+            entrada = indice.match(str(item.get("Plato", "")))
+            if entrada is not None and entrada.nombre in self._posiciones:
+                cantidades[entrada.nombre] = cantidades.get(entrada.nombre, 0) + int(item.get("Cantidad") or 0)
+        if not cantidades:
+            return []
+        with self._lock:
+            if self.store is not None:
+                restantes = self.store.sell_stock(self.sucursal, cantidades)
+            else:
+                restantes = {
+                    nombre: max(int(self.restante[self._posiciones[nombre]]) - cantidad, 0)
+                    for nombre, cantidad in cantidades.items()
+                }
+            return self._aplicar(restantes)
+
+    def sync(self):
+        """Trae del registro las ventas de otros procesos, como mucho cada INTERVALO_SYNC s."""
+        if self.store is None or self.reloj() - self._ultimo_sync < INTERVALO_SYNC:
+            return
+        with self._lock:
+            self._ultimo_sync = self.reloj()
+            self._aplicar(self.store.stock_counts(self.sucursal))
+
+    def inherit_sales(self, anterior):
+        """Copia el historial de ventas de la versión anterior del stock (al recargar stock.csv)."""
+        with anterior._lock:
+            for nombre, posicion in anterior._posiciones.items():
+                if nombre in self._posiciones:
+                    self._ventas[self._posiciones[nombre]] = anterior._ventas[posicion]
+            self._minuto = anterior._minuto
+
+    def forecast(self):
+        """Ritmo de venta (unidades/hora) y minutos hasta agotarse por ítem, del más urgente al menos."""
+        with self._lock:
+            minuto = int(self.reloj() // 60)
+            self._avanzar(minuto)
+            # Edad en minutos de cada columna del buffer; las ventas recientes pesan más
+            edad = (minuto - np.arange(self.ventana)) % self.ventana
+            pesos = 0.5 ** (edad / self.media_vida)
+            por_minuto = self._ventas @ pesos / pesos.sum()
+            restante = self.restante.copy()
+        with np.errstate(divide="ignore"):
+            minutos = np.where(por_minuto > 0, restante / por_minuto, np.inf)
+        minutos[restante <= 0] = 0
+        return pd.DataFrame({
+            "Plato": self.nombres,
+            "restante": restante,
+            "por_hora": por_minuto * 60,
+            "agota_en_min": minutos,
+        }).sort_values("agota_en_min", ignore_index=True)
+
+    def running_low(self, minutos=AVISO_MINUTOS):
+        """{ítem: unidades} de lo que, al ritmo de venta actual, se agota en `minutos` o menos."""
+        if not self.nombres:
+            return {}
+        pronostico = self.forecast()
+        pronto = pronostico[(pronostico["restante"] > 0) & (pronostico["agota_en_min"] <= minutos)]
+        return dict(zip(pronto["Plato"], pronto["restante"].tolist()))
+
+
+def _firma(ruta):
+    try:
+        info = os.stat(ruta)
+    except FileNotFoundError:
+        return None
+    return (info.st_mtime_ns, info.st_size)
+
+
+def load_stock(directorio, carta, sucursal=SUCURSAL_PRINCIPAL, store=None):
+    """Lee stock.csv del directorio de la sucursal con los nombres de la carta.
+
+    Con `store`, las unidades salen del registro compartido y solo se reponen
+    desde el archivo cuando su contenido cambió.
+    """
+    ruta = os.path.join(directorio, ARCHIVO_STOCK)
+    if not os.path.exists(ruta):
+        return Stock({})
+    with open(ruta, "rb") as f:
+        contenido = f.read()
+    indice = get_index(carta)
+    inicial = {}
+    for nombre, cantidad in pd.read_csv(io.BytesIO(contenido))[["Plato", "Stock"]].itertuples(index=False):
+        entrada = indice.match(str(nombre))
+        inicial[entrada.nombre if entrada else str(nombre)] = int(cantidad)
+    if store is not None:
+        inicial = store.init_stock(sucursal, inicial, hashlib.sha1(contenido).hexdigest())
+    return Stock(inicial, store=store, sucursal=sucursal)
+
+
+_stocks = {}   # sucursal -> (firma de stock.csv, Stock)
+_stocks_lock = threading.Lock()
+
+
+def get_stock(sucursal=SUCURSAL_PRINCIPAL, carta=None):
+    """Stock compartido del proceso para la sucursal.
+
+    Como Catalogo.actual(), vuelve a leer stock.csv solo si cambió su firma
+    (mtime, tamaño); las ventas de otros procesos se traen con `sync()`.
+    """
+    registro = get_registry()
+    directorio = registro.directorio(sucursal)
+    firma = _firma(os.path.join(directorio, ARCHIVO_STOCK))
+    with _stocks_lock:
+        actual = _stocks.get(sucursal)
+        if actual is None or actual[0] != firma:
+            stock = load_stock(directorio, carta or registro.actual(sucursal), sucursal, get_store())
+            if actual is not None:
+                stock.inherit_sales(actual[1])
+            _stocks[sucursal] = (firma, stock)
+        stock = _stocks[sucursal][1]
+    stock.sync()
+    return stock
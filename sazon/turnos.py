@@ -0,0 +1,274 @@
+import json
+import logging
+import time
+from copy import deepcopy
+
+from .cantidades import MENSAJE_LIMITE, parse_quantities
+from .cola import get_order_queue
+from .concurrencia import moderated_stream, run_in_background
+from .contexto import ContextWindow
+from .extraccion import has_confirmation_marker, parse_confirmed_order
+from .faq import answer_faq
+from .indice import get_index
+from .mensajes import new_history
+from .moderacion import moderate
+from .pedido import Pedido, update_from_reply, update_from_user
+from .prompts import build_messages
+from .stock import MENSAJE_AGOTADO
+
+MENSAJE_RESPETO = "Por favor, mantengamos la conversación respetuosa."
+
+
+def extract_order_json(backend, response, uso=None):
+    """Extrae el pedido confirmado en formato JSON desde la respuesta del bot solo si todos los campos tienen valores completos."""
+    # Sin la marca de confirmación no hay pedido que extraer: no llamamos al modelo
+    if not has_confirmation_marker(response):
+        return {}
+    order_json = parse_confirmed_order(response)
+    if order_json:
+        return order_json
+    # La tabla no se pudo leer localmente: recurrimos al modelo
+    return extract_order_json_llm(backend, response, uso)
+
+
+def extract_order_json_llm(backend, response, uso=None):
+    """Extrae el pedido confirmado usando el modelo; solo se usa si el parser local falla."""
+    prompt = f"""
+		A partir de la siguiente respuesta del asistente, extrae la información del pedido confirmado.
+
+		Respuesta del asistente:
+		'''{response}'''
+
+		Proporciona un JSON con el siguiente formato:
+
+		{{
+    			"Platos": [
+        			{{"Plato": "Nombre del plato", "Cantidad": cantidad, "Precio Total": precio_total}},
+        			...
+    				],
+    			"Total": total_pedido,
+    			"Metodo de Pago": "metodo_de_pago",
+    			"Lugar de Entrega": "lugar_entrega",
+    			"Timestamp Confirmacion": "timestamp_confirmacion"
+		}}
+
+		Si algún campo no aparece en la respuesta, asígnale el valor null.
+
+		Si el pedido no está confirmado explícitamente en la respuesta, devuelve un JSON vacío: {{}}.
+  		Responde *solo* con el JSON, sin explicaciones adicionales.
+    		"""
+    #prompt = f"Extrae la información del pedido confirmado solo de la siguiente respuesta: '{response}'. Si el pedido está confirmado, proporciona una salida en formato JSON con las siguientes claves: 'Platos' (contiene los platos, cada uno con su cantidad y precio_total), 'Total', 'metodo de pago', 'lugar_entrega', y 'timestamp_confirmacion'. Si algún campo como 'metodo de pago' o 'lugar_entrega'o 'timestamp_confirmacion' no está presente, asígnale el valor null. Si el pedido no está confirmado, devuelve un diccionario vacio."
+    #prompt = f"Extrae la información del pedido de la siguiente respuesta: '{response}'. Si el pedido está confirmado proporciona una salida en formato JSON con las claves: Platos(contine los platos con la cantidad y precio_total),Total,metodo de pago,lugar_entrega y timestamp_confirmacion. Si el pedido no está confirmado devuelve una diccionario vacio."
+
+    response_content = backend.complete(
+        [
+            {"role": "system", "content": "Eres un asistente que extrae información de pedidos en formato JSON a partir de la respuesta proporcionada."},
+            {"role": "user", "content": prompt}
+        ],
+        task="extraccion",
+        uso=uso,
+        temperature=0,
+        max_tokens=300,
+        top_p=1,
+        stop=None,
+    )
+#"gemma2-9b-it"
+    
+    # Intenta cargar como JSON
+    try:
+        order_json = json.loads(response_content)
+        #st.markdown(order_json)
+        #st.markdown(type(order_json))
+        # Verifica si el JSON es un diccionario
+        if isinstance(order_json, dict):
+            if all(order_json[key] not in (None, '', [], {}) for key in order_json):
+                return order_json
+            else:
+                print("Advertencia: Hay claves con valores nulos o vacíos en el pedido.")
+                return {}
+            # Verifica que todas las claves en order_json tengan valores no nulos
+            #return order_json if order_json else {}
+        
+        # Si el JSON es una lista, devuelves un diccionario vacío o manejas la lista de otro modo
+        elif isinstance(order_json, list):
+            print("Advertencia: Se recibió una lista en lugar de un diccionario.")
+            return {}
+        
+        # Si no es ni lista ni diccionario, retorna un diccionario vacío
+        else:
+            return {}
+    
+    except json.JSONDecodeError:
+        # Manejo de error en caso de que el JSON no sea válido
+        return {}
+
+
+def stream_completion(backend, messages, temperature=0, max_tokens=1000, traza=None):
+    """Genera la respuesta del modelo por fragmentos y registra el tiempo al primer token.
+
+    No toca st.session_state para poder avanzar desde otro hilo.
+    """
+    inicio = time.perf_counter()
+    primer_token = None
+    uso = {}
+    stream = backend.stream(messages, task="chat", uso=uso, temperature=temperature, max_tokens=max_tokens)
+    try:
+        for delta in stream:
+            if primer_token is None:
+                primer_token = time.perf_counter() - inicio
+            yield delta
+    finally:
+        # Si se deja de consumir (p. ej. moderación), cerramos la conexión
+        stream.close()
+        total = time.perf_counter() - inicio
+        ttft = "-" if primer_token is None else f"{primer_token:.3f}s"
+        logging.info(f"Latencia de respuesta: primer token {ttft}, total {total:.3f}s")
+        if traza is not None:
+            traza.record("completion", total, primer_token_ms=None if primer_token is None else round(primer_token * 1000, 3))
+            traza.add_usage(uso)
+
+
+def log_order(backend, response, carta, traza, stock=None, confirmado_en=None):
+    """Extrae el JSON del pedido confirmado, lo encola para guardarlo y lo descuenta del stock.
+
+    `confirmado_en` es el timestamp del pedido ya registrado en la sesión: si la
+    respuesta solo repite esa confirmación no se guarda ni se descuenta otra vez.
+    """
+    uso = {}
+    with traza.span("extraccion") as atributos:
+        order_json = extract_order_json(backend, response, uso)
+        atributos["confirmado"] = bool(order_json)
+    traza.add_usage(uso)
+    if not order_json:
+        return order_json
+    if confirmado_en is not None and order_json.get("Timestamp Confirmacion") == confirmado_en:
+        return {}
+    # Primero se guarda: un error en el stock no debe perder el pedido
+    get_order_queue().put(order_json)
+    if stock is not None:
+        try:
+            stock.confirm(order_json, carta)
+        except (TypeError, ValueError) as e:
+            logging.error(f"No se pudo descontar del stock el pedido {order_json.get('Timestamp Confirmacion')}: {e}")
+    return order_json
+
+
+# Función para verificar contenido inapropiado
+
+
+def check_for_inappropriate_content(backend, prompt, carta, traza):
+    """Verifica si el prompt contiene contenido inapropiado.
+
+    Los mensajes triviales ("sí", "2", "Yape", "Miraflores") se aceptan localmente y
+    los veredictos recientes se reutilizan; solo el resto llega a la API de Moderación.
+    """
+    with traza.span("moderacion"):
+        return moderate(prompt, carta, lambda texto: remote_moderation(backend, texto))
+
+
+def remote_moderation(backend, prompt):
+    """Verifica si el prompt contiene contenido inapropiado utilizando la API de Moderación de OpenAI."""
+    try:
+        return backend.moderate(prompt)
+    except NotImplementedError:
+        # Backend sin moderación: ya se avisó al configurarlo
+        return None
+    except Exception as e:
+        logging.error(f"Error al llamar a la API de Moderación: {e}")
+        # None: se deja pasar el mensaje pero no se guarda el veredicto
+        return None
+
+
+def new_state(carta):
+    """Estado de una conversación nueva: las mismas claves que guarda st.session_state."""
+    return {"messages": new_history(carta), "resumen": {}, "pedido": Pedido()}
+
+
+class Conversacion:
+    """Un turno de la conversación libre, sin interfaz.
+
+    Lo usan la app de Streamlit, la API y los benchmarks. `estado` es un mapeo
+    con "messages", "resumen" y "pedido": st.session_state o un dict de la API.
+    """
+
+    def __init__(self, backend, contexto_tokens=4000, contexto_turnos=6, executor=None):
+        self.backend = backend
+        self.contexto_tokens = contexto_tokens
+        self.contexto_turnos = contexto_turnos
+        # Pool para la moderación y el primer fragmento; None usa el de concurrencia
+        self.executor = executor
+
+    def local_reply(self, prompt, carta, stock, traza, pedido=None):
+        """Interpreta el mensaje sin llamar al modelo.
+
+        Devuelve (respuesta, pares): la respuesta local (límite de cantidades,
+        agotados, preguntas frecuentes) o None, y los pares (cantidad, Entrada)
+        reconocidos para el pedido. Con un pedido en curso los mensajes son
+        respuestas al flujo ("delivery a Miraflores"), no preguntas frecuentes.
+        """
+        with traza.span("local"):
+            # Prevalidación local: si alguna cantidad pasa el límite respondemos sin llamar al modelo
+            pares, errores = parse_quantities(prompt, get_index(carta))
+            # Platos agotados: búsqueda O(1) en el conjunto publicado por el stock
+            sin_stock = [entrada.nombre for _, entrada in pares if not stock.is_available(entrada.nombre)]
+            if MENSAJE_LIMITE in errores:
+                return MENSAJE_LIMITE, []
+            if sin_stock:
+                return MENSAJE_AGOTADO.format(platos=", ".join(dict.fromkeys(sin_stock))), []
+            if pedido or pares:
+                return None, pares
+            # Preguntas frecuentes (carta, reparto, precios) se responden desde la carta
+            return answer_faq(prompt, carta), pares
+
+    def check(self, prompt, carta, traza):
+        return check_for_inappropriate_content(self.backend, prompt, carta, traza)
+
+    def respond(self, estado, prompt, carta, stock, traza, moderate=False, temperature=0, max_tokens=1000):
+        """Turno completo: devuelve un iterador de fragmentos de la respuesta, o None si se modera.
+
+        El turno se guarda en `estado` cuando el iterador se consume entero; con
+        moderate=True la moderación corre en paralelo con la respuesta.
+        """
+        user_message = {"role": "user", "content": prompt}
+        respuesta_local, pares = self.local_reply(prompt, carta, stock, traza, estado["pedido"])
+        if respuesta_local is not None:
+            # Sin modelo no hay nada que solapar: el veredicto va antes de responder
+            # (los mensajes triviales se resuelven local o desde el caché).
+            # El pedido no cambia: una pregunta como "¿reparten a Barranco?" no elige distrito
+            if moderate and self.check(prompt, carta, traza):
+                return None
+            self._guardar(estado, user_message, respuesta_local)
+            return iter([respuesta_local])
+        # Copia del pedido: si la moderación rechaza el mensaje no debe cambiar nada.
+        # Los platos y cantidades salen del parser local, no de la tabla que escriba el modelo
+        with traza.span("prompt") as atributos:
+            pedido = update_from_user(deepcopy(estado["pedido"]), prompt, carta, pares)
+            ventana = ContextWindow(carta, token_budget=self.contexto_tokens, keep_turns=self.contexto_turnos)
+            historial, cuentas = ventana.trim([*estado["messages"], user_message], estado.setdefault("resumen", {}))
+            messages = build_messages(carta, historial, pedido, stock.agotados, stock.running_low())
+            atributos["tokens_estimados"] = cuentas["tokens_enviados"]
+            atributos["payload_bytes"] = traza.observe_payload(messages)
+        fragmentos = stream_completion(self.backend, messages, temperature, max_tokens, traza)
+        if moderate:
+            flagged, fragmentos = moderated_stream(lambda: self.check(prompt, carta, traza), fragmentos, self.executor)
+            if flagged:
+                return None
+        return self._completar(estado, user_message, fragmentos, pedido, carta, stock, traza, not pares)
+
+    def _completar(self, estado, user_message, fragmentos, pedido, carta, stock, traza, reconciliar):
+        partes = []
+        for fragmento in fragmentos:
+            partes.append(fragmento)
+            yield fragmento
+        response = "".join(partes)
+        self._guardar(estado, user_message, response)
+        confirmado_en = estado["pedido"].confirmado_en
+        estado["pedido"] = update_from_reply(pedido, response, carta, reconciliar)
+        # Extraer JSON del pedido confirmado fuera del camino de la respuesta;
+        # su span y sus tokens entran en el resumen del turno
+        run_in_background(traza.attach(log_order), self.backend, response, carta, traza, stock, confirmado_en)
+
+    @staticmethod
+    def _guardar(estado, user_message, response):
+        estado["messages"].append(user_message)
+        estado["messages"].append({"role": "assistant", "content": response})